@@ -0,0 +1,4 @@
+import time
+
+# When the app started loading, to report how long startup took
+STARTED = time.perf_counter()
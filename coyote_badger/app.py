@@ -1,13 +1,19 @@
+import json
 import os
+import socket
+import time
 import uuid
-from threading import Timer
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from io import BytesIO
+from threading import Thread
 
 import requests
 import segment.analytics as analytics
 from colorama import init
 from flask import (
     Flask,
-    after_this_request,
+    Response,
     redirect,
     render_template,
     request,
@@ -17,21 +23,35 @@ from flask import (
 from flask_bootstrap import Bootstrap
 from packaging import version
 
+from coyote_badger import STARTED
 from coyote_badger.config import (
     PORT,
     REPO,
     SEGMENT_WRITE_KEY,
+    SERVER_THREADS,
+    SOURCES_PAGE_SIZE,
     SOURCES_TEMPLATE_FILE,
+    UPDATE_CHECK_FILE,
+    UPDATE_CHECK_INTERVAL,
+    UPDATE_CHECK_TIMEOUT,
     VERSION,
 )
-from coyote_badger.converter import create_sources_template
-from coyote_badger.project import Project
+from coyote_badger.converter import convert_batch, create_sources_template
+from coyote_badger.events import EventStream
+from coyote_badger.flusher import Flusher
+from coyote_badger.project import Project, catalog
 from coyote_badger.puller import Puller
-from coyote_badger.source import Kind, Result, Source
+from coyote_badger.scheduler import schedule
+from coyote_badger.source import Kind, Result
+from coyote_badger.utils import stream_zip
+
+imported = time.perf_counter()
 
 analytics.write_key = SEGMENT_WRITE_KEY
 anonymous_id = str(uuid.uuid4())
 
+XLSX_MIMETYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
 init()
 
 app = Flask(__name__)
@@ -40,7 +60,12 @@ Bootstrap(app)
 
 citations = None
 puller = Puller()
-puller.clear_user_data()
+# Playwright's sync API only works on the thread that started it, so
+# every Puller call runs on this one thread, see run_puller()
+puller_thread = ThreadPoolExecutor(max_workers=1, thread_name_prefix="puller")
+flusher = Flusher()
+# Pull progress of each project, streamed to every tab watching it
+events = EventStream()
 
 ART_MESSAGE = r"""
 
@@ -77,6 +102,8 @@ READY_MESSAGE = rf"""
 Coyote Badger is ready to use!
 Open your browser to http://localhost:{PORT} to get started.
 """
+STARTUP_MESSAGE = """Started in {ready:.2f}s ({imports:.2f}s importing modules).
+"""
 
 
 def SuccessResponse(message=None):
@@ -93,18 +120,173 @@ def ErrorResponse(message=None):
     }
 
 
+def get_latest_tag():
+    """Gets the tag of the latest release on GitHub.
+
+    The tag is saved and only looked up again once it is older than
+    UPDATE_CHECK_INTERVAL. If GitHub doesn't answer within
+    UPDATE_CHECK_TIMEOUT (e.g. when offline), the saved tag is used.
+    :returns: The tag of the latest release, if known
+    :rtype: {str}
+    """
+    saved = {}
+    try:
+        with open(UPDATE_CHECK_FILE) as f:
+            saved = json.load(f)
+    except (OSError, ValueError):
+        pass
+    if time.time() - saved.get("checked", 0) < UPDATE_CHECK_INTERVAL:
+        return saved.get("tag_name")
+    try:
+        response = requests.get(
+            f"https://api.github.com/repos/{REPO}/releases/latest",
+            timeout=UPDATE_CHECK_TIMEOUT,
+        )
+        response.raise_for_status()
+        latest_tag = response.json().get("tag_name")
+    except (requests.RequestException, ValueError) as e:
+        print(str(e))
+        return saved.get("tag_name")
+    try:
+        os.makedirs(os.path.dirname(UPDATE_CHECK_FILE), exist_ok=True)
+        with open(UPDATE_CHECK_FILE, "w") as f:
+            json.dump({"checked": time.time(), "tag_name": latest_tag}, f)
+    except OSError as e:
+        print(str(e))
+    return latest_tag
+
+
 def has_updates():
-    response = requests.get(f"https://api.github.com/repos/{REPO}/releases/latest")
-    latest_tag = response.json().get("tag_name")
-    if version.parse(VERSION) < version.parse(latest_tag):
-        return True
+    latest_tag = get_latest_tag()
+    return bool(latest_tag) and version.parse(VERSION) < version.parse(latest_tag)
 
 
-def welcome():
-    print(ART_MESSAGE)
+def check_for_updates():
     if has_updates():
         print(UPDATE_MESSAGE)
+
+
+def wait_until_serving(port=PORT, interval=0.05):
+    """Waits until the server accepts connections.
+
+    :param port: The port the server listens on, defaults to PORT
+    :type port: int, optional
+    :param interval: The seconds between attempts, defaults to 0.05
+    :type interval: float, optional
+    """
+    while True:
+        try:
+            with socket.create_connection(("localhost", port), timeout=interval):
+                return
+        except OSError:
+            time.sleep(interval)
+
+
+def run_puller(fn, *args):
+    """Runs a Puller call on the puller thread and waits for it.
+
+    :param fn: The function to run
+    :type fn: function
+    :returns: What the function returned
+    :rtype: {object}
+    """
+    return puller_thread.submit(fn, *args).result()
+
+
+def pull_source(project, index, source):
+    """Pulls a source, reporting each stage it reaches.
+
+    Must run on the puller thread.
+    :param project: The project the source belongs to
+    :type project: Project
+    :param index: The row of the source (1-indexed)
+    :type index: int
+    :param source: The source to pull
+    :type source: Source
+    :returns: The result of the pull, and the future of its
+        post-processing (if any)
+    :rtype: {(Result, Future)}
+    """
+    on_stage = partial(publish_stage, project.name, index)
+    result = puller.pull(source, project, on_stage=on_stage)
+    return result, puller.postprocessing
+
+
+def publish_stage(project_name, index, stage):
+    events.publish(project_name, "stage", {"index": index, "stage": stage})
+
+
+def file_size(path):
+    """The size of a file, or None if it doesn't exist."""
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return None
+
+
+def record_postprocessing(project_name, index, future):
+    """Records the outcome of a source's post-processing.
+
+    Used as a done callback on the future of a pull's post-processing,
+    since the pull itself reports success as soon as the browser has
+    finished downloading. A source whose post-processing failed is
+    recorded as failed.
+    :param project_name: The name of the project the source belongs to
+    :type project_name: str
+    :param index: The row of the source (1-indexed)
+    :type index: int
+    :param future: The finished post-processing future
+    :type future: Future
+    """
+    if not future.exception():
+        out_path, saved = future.result()
+        if saved is not None:
+            print(
+                "Optimized {} in {}: saved {} bytes".format(
+                    os.path.basename(out_path), project_name, saved
+                )
+            )
+        events.publish(
+            project_name,
+            "postprocessed",
+            {"index": index, "bytes": file_size(out_path), "saved": saved},
+        )
+        project = Project.get_project(project_name)
+        if project:
+            # The pulled file is now in place, so count its bytes
+            project.update_catalog()
+        return
+    print(str(future.exception()))
+    events.publish(
+        project_name, "result", {"index": index, "result": Result.FAILURE.value}
+    )
+    project = Project.get_project(project_name)
+    if not project:
+        return
+    source = project.get_source(index)
+    source.result = Result.FAILURE
+    project.save_source(index, source)
+    flusher.notify(project_name)
+
+
+@app.template_filter("timestamp")
+def format_timestamp(seconds):
+    return time.strftime("%Y-%m-%d %H:%M", time.localtime(seconds))
+
+
+def welcome():
+    """Prints the welcome message once the server accepts requests.
+
+    The message ends with how long startup took. The update check
+    runs on its own thread, so a slow or missing network never
+    delays the app.
+    """
+    Thread(target=check_for_updates, daemon=True).start()
+    wait_until_serving()
+    ready = time.perf_counter()
+    print(ART_MESSAGE)
     print(READY_MESSAGE)
+    print(STARTUP_MESSAGE.format(ready=ready - STARTED, imports=imported - STARTED))
 
 
 @app.route("/", methods=["GET", "POST"])
@@ -114,10 +296,10 @@ def index():
     The homepage template that asks for login details,
     and the completed template.
 
-    GET: renders a template with all the past projects
+    GET: renders a template with a summary of all the past projects
     POST: creates a new project with the supplied name and source file
     """
-    projects = Project.get_projects()
+    projects = catalog.get_projects()
     if request.method == "GET":
         analytics.page(
             anonymous_id=anonymous_id,
@@ -141,7 +323,7 @@ def index():
                 projects=projects,
                 error="Missing or invalid project name.",
             )
-        if name in projects:
+        if name in Project.get_projects():
             return render_template(
                 "index.html.j2",
                 projects=projects,
@@ -222,22 +404,21 @@ def convert():
         )
         return render_template("convert.html.j2")
     elif request.method == "POST":
-        doc_file = request.files.get("file")
+        doc_files = [f for f in request.files.getlist("file") if f.filename]
 
         # Check for article/note file
-        if not doc_file:
+        if not doc_files:
             return render_template(
                 "convert.html.j2", error="Missing article/note file."
             )
 
-        try:
-            project, sources = create_sources_template(doc_file)
-
-            @after_this_request
-            def remove_temp_file(response):
-                project.delete()
-                return response
+        # Several articles/notes are converted together in a batch
+        if len(doc_files) > 1:
+            return convert_many(doc_files)
+        doc_file = doc_files[0]
 
+        try:
+            data, sources = create_sources_template(doc_file)
         except Exception as e:
             analytics.track(
                 anonymous_id=anonymous_id,
@@ -260,12 +441,64 @@ def convert():
                 },
             )
             return send_file(
-                project.sources_file,
+                BytesIO(data),
+                mimetype=XLSX_MIMETYPE,
                 as_attachment=True,
                 attachment_filename=f"{input_filename}_Sources.xlsx",
             )
 
 
+def convert_many(doc_files):
+    """Converts several uploaded articles/notes at once.
+
+    Sends either one merged Sources.xlsx file, or a zip of one
+    Sources.xlsx file per article/note, depending on the form.
+    :param doc_files: The uploaded articles/notes
+    :type doc_files: [FileStorage]
+    :returns: The response with the file to download
+    :rtype: {Response}
+    """
+    merge = request.form.get("output", "merged") == "merged"
+    dedupe = bool(request.form.get("dedupe"))
+    articles = [(os.path.splitext(f.filename)[0], f.read()) for f in doc_files]
+    try:
+        data, sources = convert_batch(articles, dedupe=dedupe, merge=merge)
+    except Exception as e:
+        analytics.track(
+            anonymous_id=anonymous_id,
+            event="Source Conversion Failed",
+            properties={
+                "message": str(e),
+                "articles": len(articles),
+            },
+        )
+        return render_template(
+            "convert.html.j2",
+            error=f"Your files could not be converted. {str(e)}",
+        )
+    analytics.track(
+        anonymous_id=anonymous_id,
+        event="Source Conversion Succeeded",
+        properties={
+            "count": len(sources),
+            "articles": len(articles),
+        },
+    )
+    if merge:
+        return send_file(
+            BytesIO(data),
+            mimetype=XLSX_MIMETYPE,
+            as_attachment=True,
+            attachment_filename="Merged_Sources.xlsx",
+        )
+    return send_file(
+        BytesIO(data),
+        mimetype="application/zip",
+        as_attachment=True,
+        attachment_filename="Sources.zip",
+    )
+
+
 @app.route("/login", methods=["GET", "POST"])
 def login():
     """Login page.
@@ -317,7 +550,8 @@ def login():
 
         # Check that log in was successful
         try:
-            puller.login(
+            run_puller(
+                puller.login,
                 hein_username,
                 hein_password,
                 westlaw_username,
@@ -354,7 +588,8 @@ def sources(project_name):
     on the provided logins and template file.
 
     GET: loads the project's sources and renders a template
-    POST: saves new source data from the UI to a project
+    POST: saves the changed cells from the UI to a project, sent as
+        {index: {field: value}} for just the rows that changed
     """
     project = Project.get_project(project_name)
     if request.method == "GET":
@@ -375,14 +610,138 @@ def sources(project_name):
             Kind=Kind,
             Result=Result,
             project_name=project_name,
-            sources=[s.to_json() for s in project.get_sources()],
+            count=project.count_sources(),
+            page_size=SOURCES_PAGE_SIZE,
         )
     elif request.method == "POST":
-        sources = [Source.from_json(source) for source in request.json]
-        project.save_sources(sources)
+        if not project:
+            return ErrorResponse("Missing project.")
+        try:
+            patch = {int(index): fields for index, fields in request.json.items()}
+        except (AttributeError, ValueError):
+            return ErrorResponse("Invalid changes.")
+        if not all(isinstance(fields, dict) for fields in patch.values()):
+            return ErrorResponse("Invalid changes.")
+        project.patch_sources(patch)
+        flusher.notify(project_name)
         return SuccessResponse()
 
 
+@app.route("/sources/<string:project_name>/page", methods=["GET"])
+def sources_page(project_name):
+    """A page of a project's sources, as json.
+
+    Lets the sources page load only the sources that are scrolled
+    into view. Sources can be filtered by their Kind and Result, with
+    each ``kind`` and ``result`` query parameter that is given.
+
+    GET: gets up to ``limit`` sources, skipping the first ``offset``
+    """
+    project = Project.get_project(project_name)
+    if not project:
+        return ErrorResponse("Missing project.")
+    kinds = request.args.getlist("kind")
+    results = request.args.getlist("result")
+    offset = max(0, request.args.get("offset", 0, type=int))
+    limit = request.args.get("limit", SOURCES_PAGE_SIZE, type=int)
+    limit = min(max(0, limit), SOURCES_PAGE_SIZE)
+    return {
+        "error": False,
+        "total": project.count_sources(kinds, results),
+        "sources": project.get_sources_page(offset, limit, kinds, results),
+    }
+
+
+@app.route("/sources/<string:project_name>/indexes", methods=["GET"])
+def source_indexes(project_name):
+    """The rows of a project's sources, as json.
+
+    Takes the same ``kind`` and ``result`` filters as the sources page
+    endpoint, so a batch of pulls can cover just the filtered sources.
+
+    GET: gets the row (1-indexed) of every matching source
+    """
+    project = Project.get_project(project_name)
+    if not project:
+        return ErrorResponse("Missing project.")
+    return {
+        "error": False,
+        "indexes": project.get_source_indexes(
+            request.args.getlist("kind"), request.args.getlist("result")
+        ),
+    }
+
+
+@app.route("/sources/<string:project_name>/progress", methods=["GET"])
+def progress(project_name):
+    """A live stream of a project's pull progress.
+
+    Sends a Server-Sent Event whenever one of the project's sources is
+    queued, starts being pulled, reaches a new stage of its pull, gets
+    a result, or finishes post-processing. Any number of tabs can
+    watch the same project, up to MAX_EVENT_STREAMS streams across all
+    of the projects.
+
+    GET: streams the project's events, or 503 if too many are open
+    """
+    queue = events.subscribe(project_name)
+    if queue is None:
+        return Response("Too many progress streams are open.", status=503)
+    response = Response(
+        events.stream(queue),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+    response.call_on_close(lambda: events.unsubscribe(project_name, queue))
+    return response
+
+
+@app.route("/sources/<string:project_name>/queue", methods=["POST"])
+def queue(project_name):
+    """Schedules a batch of pulls.
+
+    The sources are ordered by their backend and how long pulls of
+    their Kind have taken, see scheduler.schedule().
+
+    POST: tells every tab watching the project which sources are queued,
+        and gets the rows (1-indexed) in the order to pull them
+    """
+    project = Project.get_project(project_name)
+    if not project:
+        return ErrorResponse("Missing project.")
+    indexes = schedule(
+        [(index, project.get_source(index)) for index in request.json],
+        puller.timings.get_expected(),
+    )
+    events.publish(project_name, "queued", {"indexes": indexes})
+    return {
+        "error": False,
+        "indexes": indexes,
+    }
+
+
+@app.route("/sources/<string:project_name>/export", methods=["GET"])
+def export(project_name):
+    """A download link for a project's results.
+
+    Streams a zip of the project's Sources.xlsx and pull folder as it
+    is generated, so large projects start downloading right away.
+
+    GET: sends the zip of the project
+    """
+    project = Project.get_project(project_name)
+    if not project:
+        return redirect(url_for("index"))
+    analytics.track(anonymous_id=anonymous_id, event="Project Exported")
+    return Response(
+        stream_zip(project.get_export_files()),
+        mimetype="application/zip",
+        headers={
+            "Content-Disposition": f'attachment; filename="{project_name}.zip"',
+        },
+    )
+
+
 @app.route("/pull", methods=["GET", "POST"])
 def pull():
     """Endpoint to crawl the source provided.
@@ -394,7 +753,7 @@ def pull():
     POST: starts the pull of a source (assumes user is logged in)
     """
     if request.method == "GET":
-        if not puller.all_authenticated:
+        if not run_puller(getattr, puller, "all_authenticated"):
             return ErrorResponse("Not authenticated to all sources.")
         return SuccessResponse()
     elif request.method == "POST":
@@ -408,8 +767,29 @@ def pull():
 
         project = Project.get_project(project_name)
         source = project.get_source(index)
-        source.result = puller.pull(source, project)
+        events.publish(project_name, "started", {"index": index})
+        start = time.monotonic()
+        source.result, postprocessing = run_puller(pull_source, project, index, source)
+        seconds = time.monotonic() - start
         project.save_source(index, source)
+        flusher.notify(project_name)
+        events.publish(
+            project_name,
+            "result",
+            {
+                "index": index,
+                "result": source.result.value,
+                "seconds": round(seconds, 1),
+                # Not written yet if it's still being post-processed
+                "bytes": None
+                if postprocessing
+                else file_size(project.save_pull_path(source.filename, "pdf")),
+            },
+        )
+        if postprocessing:
+            postprocessing.add_done_callback(
+                partial(record_postprocessing, project_name, index)
+            )
         analytics.track(
             anonymous_id=anonymous_id,
             event="Source Pulled",
@@ -424,7 +804,21 @@ def pull():
 
 
 if __name__ == "__main__":
-    t = Timer(3, welcome)
-    t.start()
-    app.run(host="0.0.0.0", port=PORT, threaded=False, use_reloader=False)
+    Thread(target=welcome, daemon=True).start()
+    # Clearing old browser data can be slow, and only has to be done
+    # before the first browser opens, which is also on the puller thread
+    puller_thread.submit(puller.clear_user_data)
+    flusher.start()
+    if app.env == "development":
+        app.run(host="0.0.0.0", port=PORT, threaded=True, use_reloader=False)
+    else:
+        # Requests are handled by a pool of threads, and only wait on the
+        # puller thread when they need the browser, so pages, projects and
+        # conversions stay responsive while sources are being pulled
+        from waitress import serve
+
+        serve(app, host="0.0.0.0", port=PORT, threads=SERVER_THREADS)
+    puller_thread.shutdown()
+    puller.pipeline.shutdown()
+    flusher.stop()
     analytics.track(anonymous_id=anonymous_id, event="Application Started")
@@ -0,0 +1,205 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from contextlib import closing
+
+from coyote_badger.config import (
+    CONVERTER_CACHE_FILE,
+    CONVERTER_CACHE_FILES,
+    CONVERTER_CACHE_FOOTNOTES,
+    CONVERTER_CACHE_VERSION,
+    SOURCES_TEMPLATE_FILE,
+    VERSION,
+)
+from coyote_badger.project import file_signature
+from coyote_badger.source import Source
+
+CREATE_TABLES = """
+    CREATE TABLE IF NOT EXISTS files (
+        key TEXT PRIMARY KEY,
+        data BLOB,
+        sources TEXT,
+        used REAL
+    );
+    CREATE INDEX IF NOT EXISTS files_used ON files (used);
+    CREATE TABLE IF NOT EXISTS footnotes (
+        key TEXT PRIMARY KEY,
+        citations TEXT,
+        used REAL
+    );
+    CREATE INDEX IF NOT EXISTS footnotes_used ON footnotes (used);
+"""
+# Keeps the most recently used rows of a table
+EVICT = """
+    DELETE FROM {table} WHERE key NOT IN (
+        SELECT key FROM {table} ORDER BY used DESC LIMIT ?
+    )
+"""
+
+
+def content_key(data):
+    """The cache key of some content.
+
+    The SHA-256 of the content, salted with the app version, the
+    converter's cache version and the signature of the sources
+    template, so that results from an older converter or template are
+    never used.
+    :param data: The content
+    :type data: bytes
+    :returns: The key
+    :rtype: {str}
+    """
+    salt = "{}:{}:{}".format(
+        VERSION, CONVERTER_CACHE_VERSION, file_signature(SOURCES_TEMPLATE_FILE)
+    )
+    digest = hashlib.sha256(salt.encode())
+    digest.update(b"\0")
+    digest.update(data)
+    return digest.hexdigest()
+
+
+class ConverterCache(object):
+    def __init__(
+        self,
+        path=CONVERTER_CACHE_FILE,
+        max_files=CONVERTER_CACHE_FILES,
+        max_footnotes=CONVERTER_CACHE_FOOTNOTES,
+    ):
+        """Creates a new ConverterCache.
+
+        An on-disk cache of converter results, kept in an SQLite
+        database. It holds the Sources.xlsx file of every converted
+        Word document, and the cleaned and classified citations of
+        every converted footnote, both by the SHA-256 of their content.
+        Each is bounded, and the least recently used entries are
+        evicted first.
+
+        Every call opens its own connection, so the cache can be used
+        from request threads and converter worker processes alike. A
+        cache that can't be read or written is only reported, and
+        acts as if it were empty.
+        :param path: The path of the database
+        :type path: str
+        :param max_files: The most Sources.xlsx files to keep
+        :type max_files: int
+        :param max_footnotes: The most footnotes to keep
+        :type max_footnotes: int
+        """
+        self.path = path
+        self.max_files = max_files
+        self.max_footnotes = max_footnotes
+
+    def _connect(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        db = sqlite3.connect(self.path)
+        db.executescript(CREATE_TABLES)
+        return db
+
+    def get_file(self, key):
+        """Gets a cached Sources.xlsx file.
+
+        :param key: The content_key() of the Word document
+        :type key: str
+        :returns: The contents of the Sources.xlsx file and its sources,
+            or None if it isn't cached
+        :rtype: {(bytes, [Source])}
+        """
+        try:
+            with closing(self._connect()) as db, db:
+                row = db.execute(
+                    "SELECT data, sources FROM files WHERE key = ?", (key,)
+                ).fetchone()
+                if not row:
+                    return None
+                db.execute(
+                    "UPDATE files SET used = ? WHERE key = ?", (time.time(), key)
+                )
+        except sqlite3.Error as e:
+            print(str(e))
+            return None
+        data, sources = row
+        sources = [
+            Source(fn_num=fn_num, long_cite=long_cite, short_cite=short_cite, kind=kind)
+            for fn_num, long_cite, short_cite, kind in json.loads(sources)
+        ]
+        return data, sources
+
+    def put_file(self, key, data, sources):
+        """Caches a Sources.xlsx file.
+
+        :param key: The content_key() of the Word document
+        :type key: str
+        :param data: The contents of the Sources.xlsx file
+        :type data: bytes
+        :param sources: The sources in the file
+        :type sources: [Source]
+        """
+        sources = json.dumps(
+            [
+                (source.fn_num, source.long_cite, source.short_cite, source.kind.value)
+                for source in sources
+            ]
+        )
+        try:
+            with closing(self._connect()) as db, db:
+                db.execute(
+                    "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)",
+                    (key, data, sources, time.time()),
+                )
+                db.execute(EVICT.format(table="files"), (self.max_files,))
+        except sqlite3.Error as e:
+            print(str(e))
+
+    def get_footnotes(self, keys):
+        """Gets the cached results of footnotes.
+
+        :param keys: The content_key() of each footnote
+        :type keys: [str]
+        :returns: Mapping of key to the results of the footnote, for
+            the footnotes that are cached
+        :rtype: {dict(str -> [(int, str, str, str)])}
+        """
+        results = {}
+        keys = list(set(keys))
+        try:
+            with closing(self._connect()) as db, db:
+                # Stay well under SQLite's limit of query parameters
+                for i in range(0, len(keys), 500):
+                    chunk = keys[i : i + 500]
+                    query = "SELECT key, citations FROM footnotes WHERE key IN ({})"
+                    query = query.format(", ".join("?" for _ in chunk))
+                    rows = db.execute(query, chunk)
+                    for key, citations in rows:
+                        results[key] = [tuple(c) for c in json.loads(citations)]
+                now = time.time()
+                db.executemany(
+                    "UPDATE footnotes SET used = ? WHERE key = ?",
+                    [(now, key) for key in results],
+                )
+        except sqlite3.Error as e:
+            print(str(e))
+            return {}
+        return results
+
+    def put_footnotes(self, results):
+        """Caches the results of footnotes.
+
+        :param results: Mapping of the content_key() of each footnote
+            to its results
+        :type results: dict(str -> [(int, str, str, str)])
+        """
+        now = time.time()
+        try:
+            with closing(self._connect()) as db, db:
+                db.executemany(
+                    "INSERT OR REPLACE INTO footnotes VALUES (?, ?, ?)",
+                    [
+                        (key, json.dumps(citations), now)
+                        for key, citations in results.items()
+                    ],
+                )
+                db.execute(EVICT.format(table="footnotes"), (self.max_footnotes,))
+        except sqlite3.Error as e:
+            print(str(e))
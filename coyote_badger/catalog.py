@@ -0,0 +1,135 @@
+import json
+import os
+import sqlite3
+from contextlib import closing
+
+from coyote_badger.config import CATALOG_FILE
+
+CREATE_TABLES = """
+    CREATE TABLE IF NOT EXISTS projects (
+        name TEXT PRIMARY KEY,
+        sources INTEGER,
+        results TEXT,  -- json of Result value -> count
+        kinds TEXT,  -- json of Kind value -> count
+        pulled_bytes INTEGER,
+        updated REAL  -- time of the last activity
+    );
+"""
+
+
+class Catalog(object):
+    def __init__(self, path=CATALOG_FILE):
+        """Creates a new Catalog.
+
+        A persisted index of every project, with summary statistics
+        of its sources (how many there are, how many of each Result
+        and Kind, how many bytes were pulled) and the time of its last
+        activity. Projects update their own entry whenever their
+        sources are saved or pulled, so listing the projects never
+        needs to open them.
+
+        Every call opens its own connection, so the catalog can be
+        used from any thread.
+        :param path: The path of the database
+        :type path: str
+        """
+        self.path = path
+
+    def _connect(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        db = sqlite3.connect(self.path)
+        db.row_factory = sqlite3.Row
+        db.executescript(CREATE_TABLES)
+        return db
+
+    def update(self, name, sources, results, kinds, pulled_bytes, updated):
+        """Updates the entry of a project.
+
+        :param name: The name of the project
+        :type name: str
+        :param sources: The number of sources
+        :type sources: int
+        :param results: The number of sources with each Result value
+        :type results: dict(str -> int)
+        :param kinds: The number of sources with each Kind value
+        :type kinds: dict(str -> int)
+        :param pulled_bytes: The total size of the pulled files
+        :type pulled_bytes: int
+        :param updated: The time of the project's last activity
+        :type updated: float
+        """
+        try:
+            with closing(self._connect()) as db, db:
+                db.execute(
+                    "INSERT OR REPLACE INTO projects VALUES (?, ?, ?, ?, ?, ?)",
+                    (
+                        name,
+                        sources,
+                        json.dumps(results),
+                        json.dumps(kinds),
+                        pulled_bytes,
+                        updated,
+                    ),
+                )
+        except sqlite3.Error as e:
+            print(str(e))
+
+    def remove(self, name):
+        """Removes the entry of a project.
+
+        :param name: The name of the project
+        :type name: str
+        """
+        try:
+            with closing(self._connect()) as db, db:
+                db.execute("DELETE FROM projects WHERE name = ?", (name,))
+        except sqlite3.Error as e:
+            print(str(e))
+
+    def retain(self, names):
+        """Removes the entries of projects that no longer exist.
+
+        :param names: The names of the projects that exist
+        :type names: [str]
+        """
+        names = set(names)
+        try:
+            with closing(self._connect()) as db, db:
+                rows = db.execute("SELECT name FROM projects").fetchall()
+                db.executemany(
+                    "DELETE FROM projects WHERE name = ?",
+                    [(row["name"],) for row in rows if row["name"] not in names],
+                )
+        except sqlite3.Error as e:
+            print(str(e))
+
+    def get_names(self):
+        """Gets the names of the projects in the catalog.
+
+        :returns: The names of the projects
+        :rtype: {set(str)}
+        """
+        return set(entry["name"] for entry in self.get_projects())
+
+    def get_projects(self):
+        """Gets the entry of every project, most recently active first.
+
+        :returns: Each project's name, sources, results, kinds,
+            pulled_bytes and updated time
+        :rtype: {[dict]}
+        """
+        try:
+            with closing(self._connect()) as db:
+                rows = db.execute(
+                    "SELECT * FROM projects ORDER BY updated DESC"
+                ).fetchall()
+        except sqlite3.Error as e:
+            print(str(e))
+            return []
+        projects = []
+        for row in rows:
+            entry = dict(row)
+            entry["results"] = json.loads(entry["results"])
+            entry["kinds"] = json.loads(entry["kinds"])
+            projects.append(entry)
+        return projects
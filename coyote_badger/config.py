@@ -6,8 +6,61 @@ PACKAGE_FOLDER = os.path.abspath(os.path.dirname(os.path.realpath(__file__)))
 SOURCES_TEMPLATE_FILE = os.path.join(PACKAGE_FOLDER, "static", "Sources.xlsx")
 
 PORT = 3000
+# The most pull progress streams open at once. Every open sources page
+# keeps a server thread busy with its stream, so pages past the limit
+# are turned away (and retry later) rather than starving other requests.
+MAX_EVENT_STREAMS = 8
+# How many requests the production server handles at once: a thread for
+# each progress stream, and the rest for every other request (e.g. a
+# /pull request holds its thread for the whole pull)
+SERVER_THREADS = MAX_EVENT_STREAMS + 8
+
+# The summary of every project shown on the home page
+CATALOG_FILE = os.path.join(PROJECTS_FOLDER, ".catalog.db")
+
+# How many opened projects to keep in memory
+PROJECT_CACHE_SIZE = 16
+# The most sources sent to the sources page at a time
+SOURCES_PAGE_SIZE = 100
 
 SEGMENT_WRITE_KEY = "JaFBSHlhMcRfjCovHfFVHIuN5TAj2WkL"
 
 REPO = "alexsands/coyote-badger"
 VERSION = "2.2.1"
+# The latest release is looked up at most once a day, and never waited
+# on for more than a few seconds
+UPDATE_CHECK_FILE = os.path.join(PROJECTS_FOLDER, ".update_check.json")
+UPDATE_CHECK_INTERVAL = 24 * 60 * 60
+UPDATE_CHECK_TIMEOUT = 3
+
+PIPELINE_WORKERS = 2
+
+# How long pulls of each Kind take is kept as a moving average, where
+# each new pull has this weight
+PULL_TIMINGS_FILE = os.path.join(PROJECTS_FOLDER, ".pull_timings.db")
+PULL_TIMINGS_WEIGHT = 0.2
+# The seconds a backend should rest between two of its pulls, for the
+# backends that limit how often they can be used
+PULL_RATE_LIMITS = {"Hein": 30}
+# How many articles/notes to convert at once in a batch conversion
+CONVERTER_WORKERS = 4
+# Cache converted Word documents and footnotes, keeping the most recent
+CONVERTER_CACHE_FILE = os.path.join(PROJECTS_FOLDER, ".converter_cache.db")
+CONVERTER_CACHE_FILES = 50
+CONVERTER_CACHE_FOOTNOTES = 100000
+# Bump whenever the converter's output changes, so older results in the
+# cache are not used
+CONVERTER_CACHE_VERSION = 1
+# Optionally shrink pulled PDFs in the background after they're saved
+OPTIMIZE_PDFS = False
+# The most resolution kept in raster pages, as printed to the width of a
+# letter page. Website screenshots come out at about 140-150 DPI, so a
+# lower value is what shrinks them.
+OPTIMIZE_IMAGE_DPI = 150
+
+# Seconds between keepalives on an idle pull progress stream
+EVENTS_KEEPALIVE = 15
+
+# Write pull results back to Sources.xlsx every N results or T seconds
+FLUSH_EVERY = 10
+FLUSH_INTERVAL = 30
@@ -1,120 +1,622 @@
+import posixpath
 import re
-from tempfile import NamedTemporaryFile
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from threading import Lock
+from xml.etree.ElementTree import fromstring, iterparse
+from zipfile import ZipFile
 
-from docx2python import docx2python
-from openpyxl import load_workbook
-from urlextract import URLExtract
+from coyote_badger.cache import ConverterCache, content_key
+from coyote_badger.config import CONVERTER_WORKERS, SOURCES_TEMPLATE_FILE
+from coyote_badger.project import (
+    DATA_START_ROW,
+    HEADER_ROW,
+    SOURCE_SHEET,
+    Project,
+    clean_sheet,
+    fill_row,
+)
+from coyote_badger.source import Kind, Source, classify
+from coyote_badger.utils import clean_string, find_url
+
+ARTICLE_HEADER = "Article"
+
+# The cleaned sources template, parsed once per process. Every
+# conversion fills it in, saves it, then empties it again, so it is
+# only used while holding the lock.
+_template = None
+_template_lock = Lock()
 
-from coyote_badger.config import (
-    CONVERTER_FOLDER_PREFIX,
-    PROJECTS_FOLDER,
-    SOURCES_TEMPLATE_FILE,
+converter_cache = ConverterCache()
+
+W_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+RELS_NS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+FOOTNOTES_REL_TYPE = (
+    "http://schemas.openxmlformats.org/officeDocument/2006/relationships/footnotes"
 )
-from coyote_badger.project import Project
-from coyote_badger.source import Kind, Source
-from coyote_badger.utils import clean_string
+DOCUMENT_RELS_FILE = "word/_rels/document.xml.rels"
+FOOTNOTES_FILE = "word/footnotes.xml"
+# Footnotes that Word uses for the line above the footnotes
+SEPARATOR_TYPES = ("separator", "continuationSeparator", "continuationNotice")
 
-extractor = URLExtract()
+# Introductory signals, e.g. "See", "See, e.g.,", "But cf.". "Contra"
+# and "Accord" are left alone since they also start party names (e.g.
+# "Contra Costa County").
+SIGNAL_RE = re.compile(
+    "^(?:(?:see(?: also| generally)?|cf\\.|compare|but (?:see|cf\\.)|e\\.g\\.)"
+    "[,:]?\\s+)+",
+    re.IGNORECASE,
+)
+# What separates the authors of a source, e.g. "John Smith & Jane Doe"
+AUTHORS_RE = re.compile("\\s*(?:&|\\band\\b)\\s*")
+# A parenthetical that is part of the name of the source, e.g. the
+# "(Second)" of "Restatement (Second) of Torts" or "(3d ed. 2010)",
+# rather than a court/year or an explanation of the citation
+EDITION_RE = re.compile(
+    "^\\((?:(?:first|second|third|fourth|fifth|sixth|seventh|eighth|ninth|tenth"
+    "|[0-9]+(?:st|nd|rd|th|d))|.*\\bed\\..*|.*\\b(?:series|ser\\.|n\\.s\\.).*)\\)$",
+    re.IGNORECASE,
+)
+# A pin cite in a short form, e.g. "at 813", "at 813-15 n.4"
+AT_PIN_RE = re.compile(
+    ",?\\s+at\\s+[0-9]+(?:\\s*[-–—]\\s*[0-9]+)?(?:\\s*,\\s*[0-9]+(?:[-–—][0-9]+)?)*"
+    "(?:\\s*nn?\\.\\s*[0-9]+(?:[-–—][0-9]+)?)?",
+    re.IGNORECASE,
+)
+# A volume, reporter and first page, e.g. "12 Harv. L. Rev. 34"
+VOLUME_RE = re.compile("\\b([0-9]+)\\s+([A-Za-z][\\w. ]*?)\\s+([0-9]+)\\b")
+# A volume, reporter and first page followed by pin cites, e.g.
+# "12 Harv. L. Rev. 34, 40-41"
+PAGE_PIN_RE = re.compile(
+    "(\\b[0-9]+\\s+[A-Za-z][\\w. ]*?\\s+[0-9]+)"
+    "(?:,\\s*[0-9]+(?:[-–—][0-9]+)?(?:\\s*nn?\\.\\s*[0-9]+)?)+"
+)
+# A short form that refers to an earlier citation by its author or
+# title, e.g. "Smith, supra note 4, at 12"
+SUPRA_RE = re.compile("^(.*?),?\\s+(?:supra|infra)\\b", re.IGNORECASE)
+# A short form that refers to an earlier case by its reporter, e.g.
+# "Jones, 5 F.3d at 12"
+CASE_SHORT_FORM_RE = re.compile(
+    "^(?:(.*?),\\s*)?([0-9]+)\\s+([A-Za-z][\\w. ]*?)\\s+at\\s+([0-9]+)"
+)
+# What is left of "Id." and "Ibid." once they are normalized
+ID_KEYS = ("id", "ibid")
 
 
-def create_sources_template(doc_file):
-    docx = docx2python(doc_file)
+def get_footnotes_file(docx):
+    """Finds the footnotes part of a Word document.
 
-    # Gather all the sources, removing duplicate citations
-    sources = []
-    seen = {}
-    footnote_count = 0
-    for footnote in docx.footnotes[0][0][0]:
-        # Ignore blank footnotes
-        if not footnote:
+    :param docx: The opened .docx file
+    :type docx: ZipFile
+    :returns: The name of the footnotes part, or None if there isn't one
+    :rtype: {str}
+    """
+    try:
+        rels = fromstring(docx.read(DOCUMENT_RELS_FILE))
+    except KeyError:
+        rels = None
+    if rels is not None:
+        for rel in rels.iter(RELS_NS + "Relationship"):
+            if rel.get("Type") == FOOTNOTES_REL_TYPE:
+                target = rel.get("Target", "")
+                if target.startswith("/"):
+                    return target[1:]
+                return posixpath.normpath(posixpath.join("word", target))
+    if FOOTNOTES_FILE in docx.namelist():
+        return FOOTNOTES_FILE
+    return None
+
+
+def iter_footnotes(doc_file):
+    """Reads the footnotes of a Word document one at a time.
+
+    Only the footnotes part of the document is read, and it's parsed
+    as a stream, so the size of the body and any embedded media don't
+    matter. Each footnote is yielded as the text of its paragraphs,
+    leaving out blank paragraphs and footnotes.
+    :param doc_file: The .docx file, or its path
+    :type doc_file: file or str
+    :yields: The paragraphs of each footnote, in order
+    :rtype: {[str]}
+    """
+    with ZipFile(doc_file) as docx:
+        footnotes_file = get_footnotes_file(docx)
+        if not footnotes_file:
+            return
+        with docx.open(footnotes_file) as xml:
+            root = None
+            paragraphs = []
+            text = []
+            in_run = False
+            for event, element in iterparse(xml, events=("start", "end")):
+                tag = element.tag
+                if event == "start":
+                    if root is None:
+                        root = element
+                    elif tag == W_NS + "r":
+                        in_run = True
+                    elif tag == W_NS + "footnote":
+                        paragraphs = []
+                        text = []
+                    continue
+
+                if tag == W_NS + "t":
+                    text.append(element.text or "")
+                elif tag == W_NS + "tab" and in_run:
+                    text.append("\t")
+                elif tag == W_NS + "r":
+                    in_run = False
+                elif tag == W_NS + "p":
+                    paragraph = "".join(text)
+                    if paragraph.strip():
+                        paragraphs.append(paragraph)
+                    text = []
+                elif tag == W_NS + "footnote":
+                    is_separator = element.get(W_NS + "type") in SEPARATOR_TYPES
+                    # Drop the parsed footnote so memory stays flat
+                    root.clear()
+                    if paragraphs and not is_separator:
+                        yield paragraphs
+
+
+def normalize(text):
+    """Normalizes text so that trivial differences don't matter.
+
+    Only the letters and numbers are kept, in lowercase, so differences
+    in case, whitespace and punctuation go away.
+    :param text: The text
+    :type text: str
+    :returns: The normalized text
+    :rtype: {str}
+    """
+    return re.sub("[\\W_]+", "", text.lower())
+
+
+def strip_parentheticals(citation):
+    """Removes the parentheticals at the end of a citation.
+
+    Court/year parentheticals (e.g. "(2d Cir. 2000)") and explanatory
+    ones (e.g. "(holding that ...)", which may have nested parentheses)
+    are removed, from the last one back. Edition and series
+    parentheticals (e.g. "(3d ed. 2010)") name the source, so they are
+    kept, along with everything before them.
+    :param citation: The citation
+    :type citation: str
+    :returns: The citation without its trailing parentheticals
+    :rtype: {str}
+    """
+    citation = citation.rstrip()
+    while citation.endswith(")"):
+        depth = 0
+        for start in range(len(citation) - 1, -1, -1):
+            if citation[start] == ")":
+                depth += 1
+            elif citation[start] == "(":
+                depth -= 1
+                if depth == 0:
+                    break
+        else:
+            # The parentheses are unbalanced
+            break
+        if EDITION_RE.match(citation[start:]):
+            break
+        citation = citation[:start].rstrip()
+    return citation
+
+
+def citation_key(citation):
+    """Gets the key that identifies the source of a citation.
+
+    Signals, trailing parentheticals and pin cites are removed before
+    the citation is normalized, so "See Foo v. Bar, 1 U.S. 2, 5 (2000)"
+    and "Foo v. Bar, 1 U.S. 2 (2000)" have the same key. Parentheticals
+    that tell sources apart, like the "(Second)" of "Restatement
+    (Second) of Torts" or an edition, are kept.
+    :param citation: The citation, without its signal
+    :type citation: str
+    :returns: The key of the citation
+    :rtype: {str}
+    """
+    citation = strip_parentheticals(citation)
+    citation = AT_PIN_RE.sub("", citation)
+    citation = PAGE_PIN_RE.sub("\\1", citation)
+    return normalize(citation)
+
+
+class CitationIndex(object):
+    def __init__(self):
+        """Creates a new CitationIndex.
+
+        The index remembers the first full citation of every source,
+        so that later citations of the same source can be found in
+        constant time, whether they repeat it with a different signal,
+        pin cite or spacing, or use a short form ("Id.", "supra",
+        "Jones, 5 F.3d at 12").
+        """
+        self.keys = {}  # citation key -> first full citation
+        self.names = {}  # normalized author/title -> first full citation
+        # (volume, reporter) -> [(name, first page, full citation)]
+        self.reporters = {}
+        self.last = None  # the full citation of the last citation
+
+    def find(self, citation):
+        """Finds the earlier full citation that a citation refers to.
+
+        :param citation: The citation
+        :type citation: str
+        :returns: The first full citation of the same source, or None if
+            this is a new source
+        :rtype: {str}
+        """
+        citation = SIGNAL_RE.sub("", citation)
+        key = citation_key(citation)
+        if key in ID_KEYS:
+            found = self.last
+        else:
+            found = self.keys.get(key)
+        if found is None:
+            match = SUPRA_RE.search(citation)
+            if match:
+                found = self.names.get(normalize(match.group(1)))
+        if found is None:
+            found = self._find_case(citation)
+        if found is not None:
+            self.last = found
+        return found
+
+    def add(self, citation):
+        """Adds the full citation of a new source to the index.
+
+        :param citation: The citation
+        :type citation: str
+        """
+        stripped = SIGNAL_RE.sub("", citation)
+        self.keys.setdefault(citation_key(stripped), citation)
+        parts = stripped.split(",")
+        name = normalize(parts[0])
+        # Short forms use the authors (by their full or last names), or
+        # the authors and the title
+        authors = AUTHORS_RE.split(parts[0])
+        last_names = [author.split()[-1] for author in authors if author.split()]
+        for i in (1, 2):
+            if len(parts) > i:
+                title = parts[1:i]
+                for author in (parts[0], " ".join(last_names)):
+                    self.names.setdefault(
+                        normalize(",".join([author] + title)), citation
+                    )
+        for volume, reporter, page in VOLUME_RE.findall(stripped):
+            cases = self.reporters.setdefault((volume, normalize(reporter)), [])
+            cases.append((name, int(page), citation))
+        self.last = citation
+
+    def _find_case(self, citation):
+        match = CASE_SHORT_FORM_RE.search(citation)
+        if not match:
+            return None
+        name, volume, reporter, pin = match.groups()
+        # The author or party name, without any title
+        name = normalize((name or "").split(",")[0])
+        cases = [
+            (page, found)
+            for case_name, page, found in self.reporters.get(
+                (volume, normalize(reporter)), []
+            )
+            if name in case_name
+        ]
+        # The pin is in the case that starts closest before it
+        before = [(page, found) for page, found in cases if page <= int(pin)]
+        if before:
+            return max(before, key=lambda case: case[0])[1]
+        # Without a page to go by, only the name can tell the case
+        if name and cases:
+            return cases[0][1]
+        return None
+
+
+def clean_citations(footnote):
+    """Splits a footnote into its cleaned citations.
+
+    Citations that are just "Id." (or a pin cite of it) are left out.
+    :param footnote: The text of each paragraph of the footnote
+    :type footnote: [str]
+    :returns: The position of each citation in the footnote, and the
+        cleaned citation
+    :rtype: {[(int, str)]}
+    """
+    citations = []
+    for paragraph in footnote:
+        clean_paragraph = paragraph.strip(".")  # remove leading/trailing "."
+        citations += clean_paragraph.split(";")  # split at each citation
+    cleaned = []
+    for citation_count, citation in enumerate(citations):
+        long_cite = citation
+
+        # --------------------------------------------------------------
+        # Clean the long_cite
+        # --------------------------------------------------------------
+        # Remove any double spaces or weird spacing
+        long_cite = clean_string(long_cite)
+        long_cite = " ".join(long_cite.split())
+
+        # Remove any commentary that happens in parentheses at
+        # the end of a citation. Avoid commentary that has a nested
+        # parenthesis because this indicates we might be picking up
+        # a year and removing that too, e.g.:
+        # ... 374 (2006) ([I]ssues concerning police intent) would
+        # remove (2006) if we don't check nested parens.
+        if re.search("\\([^\\(]{12,}?\\)$", long_cite):
+            long_cite = re.sub("(\\([^\\(]{12,}?\\)$)", "", long_cite)
+
+        # Strip any new whitespace again after cleaning
+        long_cite = long_cite.strip()
+
+        # --------------------------------------------------------------
+        # Skip/ignore the duplicate citations
+        # --------------------------------------------------------------
+        # The case where the citation is just "Id." or a variant
+        if long_cite.lower() == "id." or long_cite.lower() == "id":
             continue
 
-        # Ignore the footnote metadata
-        if footnote.startswith("footnote"):
+        # The case where the citation is just "See id" or a variant
+        if long_cite.lower() == "see id." or long_cite.lower() == "see id":
             continue
 
-        # Now we are looking at actual citation footnotes
-        footnote_count += 1
-        clean_footnote = footnote.strip(".")  # remove leading/trailing "."
-        citations = clean_footnote.split(";")  # split at each citation
-        for citation_count, citation in enumerate(citations):
+        # The case where a citation is in the format "Id. at 813"
+        if re.search("^[iI][dD].? at [0-9]+[-–—]?[0-9]+.?$", long_cite):
+            continue
+
+        cleaned.append((citation_count, long_cite))
+    return cleaned
+
+
+def predict_short_cite(long_cite, kind):
+    """Tries to predict the short_cite of a citation, given its Kind.
+
+    :param long_cite: The citation
+    :type long_cite: str
+    :param kind: The Kind of the citation
+    :type kind: Kind
+    :returns: The short_cite, or None if it isn't predictable
+    :rtype: {str}
+    """
+    # Predict short_cite for websites
+    if kind == Kind.WEBSITE or kind == Kind.SSRN:
+        return find_url(long_cite)
+
+    # Predict short_cite for SCOTUS cases
+    if kind == Kind.SCOTUS:
+        match = re.search("([0-9]+ .{3,}? [0-9]+)", long_cite)
+        return match.group(1) if match else None
+
+    # Predict short_cite for journals
+    if kind == Kind.JOURNAL:
+        match = re.search("([0-9]+ .{7,}? [0-9]+)", long_cite)
+        return match.group(1) if match else None
+
+    # For anything else, just leave short_cite blank because
+    # there are weird edge cases that aren't worth it. The
+    # accuracy needs to be really high, otherwise people gloss
+    # over the predicted short_cite without closely checking it.
+    # Better to leave blank and have people fill these manually.
+    return None
+
+
+def process_footnotes(footnotes):
+    """Cleans and classifies the citations of footnotes.
+
+    :param footnotes: The text of each paragraph of each footnote
+    :type footnotes: [[str]]
+    :returns: For each footnote, the position, cleaned citation, Kind
+        value and predicted short_cite of each of its citations
+    :rtype: {[[(int, str, str, str)]]}
+    """
+    cleaned = [clean_citations(footnote) for footnote in footnotes]
+    # Predict the Kind of all the citations at once
+    kinds = iter(classify([cite for citations in cleaned for _, cite in citations]))
+    results = []
+    for citations in cleaned:
+        result = []
+        for citation_count, long_cite in citations:
+            kind = next(kinds)
+            short_cite = predict_short_cite(long_cite, kind)
+            result.append((citation_count, long_cite, kind.value, short_cite))
+        results.append(result)
+    return results
+
+
+def extract_sources(doc_file):
+    """Gathers the sources cited in an article/note's footnotes.
+
+    Each footnote's citations are cleaned and classified once and
+    kept in the converter cache by the footnote's text, so an edited
+    article/note only processes the footnotes that changed.
+    :param doc_file: The article/note Word document
+    :type doc_file: file
+    :returns: The sources, in the order they are first cited
+    :rtype: {[Source]}
+    """
+    footnotes = list(iter_footnotes(doc_file))
+    keys = [content_key("\0".join(footnote).encode()) for footnote in footnotes]
+    results = converter_cache.get_footnotes(keys)
+    missing = {}
+    for key, footnote in zip(keys, footnotes):
+        if key not in results:
+            missing[key] = footnote
+    if missing:
+        processed = dict(zip(missing, process_footnotes(list(missing.values()))))
+        converter_cache.put_footnotes(processed)
+        results.update(processed)
+
+    # Gather all the sources, removing duplicate citations
+    sources = []
+    index = CitationIndex()
+    for footnote_count, key in enumerate(keys, start=1):
+        for citation_count, long_cite, kind, short_cite in results[key]:
+            # Any other citation of a source we've already seen, like the
+            # same citation with another signal or pin cite, or a short
+            # form ("supra", "Jones, 5 F.3d at 12", "See id. at 5 n.2")
+            if index.find(long_cite) is not None:
+                continue
+
             # Format the FN# to two digits so that 3.04 appears before 3.11
             fn_num = float("{}.{:0=2d}".format(footnote_count, citation_count))
-            long_cite = citation
-
-            # ----------------------------------------------------------
-            # Clean the long_cite
-            # ----------------------------------------------------------
-            # Remove any double spaces or weird spacing
-            long_cite = clean_string(long_cite)
-            long_cite = " ".join(long_cite.split())
-
-            # Remove any commentary that happens in parentheses at
-            # the end of a citation. Avoid commentary that has a nested
-            # parenthesis because this indicates we might be picking up
-            # a year and removing that too, e.g.:
-            # ... 374 (2006) ([I]ssues concerning police intent) would
-            # remove (2006) if we don't check nested parens.
-            if re.search("\\([^\\(]{12,}?\\)$", long_cite):
-                long_cite = re.sub("(\\([^\\(]{12,}?\\)$)", "", long_cite)
-
-            # Strip any new whitespace again after cleaning
-            long_cite = long_cite.strip()
-
-            # Create the source so we can use it's Kind prediction
-            source = Source(fn_num=fn_num, long_cite=long_cite)
-
-            # ----------------------------------------------------------
-            # Skip/ignore the duplicate citations
-            # ----------------------------------------------------------
-            # The obvious case where we've already seen this exactly
-            if long_cite in seen:
-                continue
+            sources.append(
+                Source(
+                    fn_num=fn_num,
+                    long_cite=long_cite,
+                    short_cite=short_cite,
+                    kind=kind,
+                )
+            )
+            index.add(long_cite)
+    return sources
 
-            # The case where the citation is just "Id." or a variant
-            if long_cite.lower() == "id." or long_cite.lower() == "id":
-                continue
 
-            # The case where the citation is just "See id" or a variant
-            if long_cite.lower() == "see id." or long_cite.lower() == "see id":
-                continue
+def get_template():
+    """Gets the cleaned sources template workbook.
 
-            # The case where a citation is in the format "Id. at 813"
-            if re.search("^[iI][dD].? at [0-9]+[-–—]?[0-9]+.?$", long_cite):
-                continue
+    The template is parsed and cleaned of its blank rows the first
+    time it is needed, then kept in memory. Must be called while
+    holding _template_lock.
+    :returns: The template workbook, and the mapping of Header value
+        to column index in its Sources sheet
+    :rtype: {(Workbook, dict(str -> int))}
+    """
+    global _template
+    if _template is None:
+        from openpyxl import load_workbook
+
+        wb = load_workbook(SOURCES_TEMPLATE_FILE)
+        ws = wb[SOURCE_SHEET]
+        clean_sheet(ws)
+        header_index = Project.index_headers(cell.value for cell in ws[HEADER_ROW])
+        _template = (wb, header_index)
+    return _template
+
+
+def create_sources_file(sources, articles=None):
+    """Creates a Sources.xlsx file holding the sources.
+
+    The rows are written into the in-memory template, which is then
+    serialized once, without going through a Project.
+    :param sources: The sources to save in the file
+    :type sources: [Source]
+    :param articles: The article/note each source came from, which is
+        added as an extra column, defaults to None (no column)
+    :type articles: [str], optional
+    :returns: The contents of the Sources.xlsx file
+    :rtype: {bytes}
+    """
+    buffer = BytesIO()
+    with _template_lock:
+        wb, header_index = get_template()
+        ws = wb[SOURCE_SHEET]
+        columns = sorted(header_index.values())
+        # Fill in the first free column with the articles/notes
+        article_column = columns[-1] + 1
+        article_header = ws.cell(row=HEADER_ROW, column=article_column).value
+        try:
+            for row, source in enumerate(sources, start=DATA_START_ROW):
+                cells = [ws.cell(row=row, column=column) for column in columns]
+                fill_row(cells, source, header_index)
+            if articles:
+                ws.cell(row=HEADER_ROW, column=article_column, value=ARTICLE_HEADER)
+                for row, article in enumerate(articles, start=DATA_START_ROW):
+                    ws.cell(row=row, column=article_column, value=article)
+            wb.save(buffer)
+        finally:
+            # Empty the template for the next conversion
+            ws.cell(row=HEADER_ROW, column=article_column).value = article_header
+            ws.delete_rows(DATA_START_ROW, max(len(sources), len(articles or ())))
+    return buffer.getvalue()
+
+
+def create_sources_template(doc_file):
+    """Creates the sources template of an article/note.
+
+    The result is kept in the converter cache by the contents of the
+    Word document, so uploading the same file again is answered from
+    the cache.
+
+    :param doc_file: The article/note Word document
+    :type doc_file: file
+    :returns: The contents of the Sources.xlsx file, and the sources
+    :rtype: {(bytes, [Source])}
+    """
+    data = doc_file.read()
+    key = content_key(data)
+    cached = converter_cache.get_file(key)
+    if cached:
+        return cached
+    sources = extract_sources(BytesIO(data))
+    sources_file = create_sources_file(sources)
+    converter_cache.put_file(key, sources_file, sources)
+    return sources_file, sources
+
+
+def _extract_sources_from_data(data):
+    return extract_sources(BytesIO(data))
+
+
+def convert_batch(articles, dedupe=False, merge=True, max_workers=CONVERTER_WORKERS):
+    """Creates the sources templates of many articles/notes at once.
+
+    Each article/note is converted in its own worker process, and
+    keeps its own FN# numbering. With ``dedupe``, a source that was
+    already cited by an earlier article/note (in upload order) is left
+    out of the later ones.
+
+    With ``merge``, every source goes into one Sources.xlsx file with
+    an extra column naming the article/note it came from. Otherwise
+    each article/note gets its own Sources.xlsx file, and they are
+    returned as a zip.
+    :param articles: The name and contents of each article/note
+    :type articles: [(str, bytes)]
+    :param dedupe: Whether to remove sources cited by an earlier
+        article/note, defaults to False
+    :type dedupe: bool, optional
+    :param merge: Whether to create one merged Sources.xlsx file,
+        defaults to True
+    :type merge: bool, optional
+    :param max_workers: The most worker processes to use
+    :type max_workers: int, optional
+    :returns: The contents of the Sources.xlsx file (or the zip), and
+        all the sources
+    :rtype: {(bytes, [Source])}
+    """
+    names = [name for name, _ in articles]
+    workers = max(1, min(max_workers, len(articles)))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = list(
+            executor.map(_extract_sources_from_data, [data for _, data in articles])
+        )
+
+        if dedupe:
+            index = CitationIndex()
+            for i, sources in enumerate(results):
+                results[i] = []
+                for source in sources:
+                    if index.find(source.long_cite) is None:
+                        results[i].append(source)
+                        index.add(source.long_cite)
+
+        all_sources = [source for sources in results for source in sources]
+        if merge:
+            articles = [name for name, sources in zip(names, results) for _ in sources]
+            return create_sources_file(all_sources, articles), all_sources
 
-            # ----------------------------------------------------------
-            # Try to predict the short_cite, now that we have a Kind
-            # ----------------------------------------------------------
-            # Predict short_cite for websites
-            if source.kind == Kind.WEBSITE or source.kind == Kind.SSRN:
-                if extractor.has_urls(long_cite):
-                    source.short_cite = extractor.find_urls(long_cite)[0]
-
-            # Predict short_cite for SCOTUS cases
-            if source.kind == Kind.SCOTUS:
-                match = re.search("([0-9]+ .{3,}? [0-9]+)", long_cite)
-                source.short_cite = match.group(1)
-
-            # Predict short_cite for journals
-            if source.kind == Kind.JOURNAL:
-                match = re.search("([0-9]+ .{7,}? [0-9]+)", long_cite)
-                source.short_cite = match.group(1)
-
-            # For anything else, just leave short_cite blank because
-            # there are weird edge cases that aren't worth it. The
-            # accuracy needs to be really high, otherwise people gloss
-            # over the predicted short_cite without closely checking it.
-            # Better to leave blank and have people fill these manually.
-
-            sources.append(source)
-            seen[long_cite] = True
-
-    # Create the template file from the sources
-    with NamedTemporaryFile(
-        dir=PROJECTS_FOLDER, prefix=CONVERTER_FOLDER_PREFIX
-    ) as temp_file:
-        temp_name = temp_file.name
-    project = Project(temp_name, load_workbook(SOURCES_TEMPLATE_FILE))
-    project.save_sources(sources)
-    return project, sources
+        # Write each article/note's file in the workers too
+        files = executor.map(create_sources_file, results)
+        buffer = BytesIO()
+        with ZipFile(buffer, "w") as zip_file:
+            used = set()
+            for name, data in zip(names, files):
+                arcname = f"{name}_Sources.xlsx"
+                count = 1
+                while arcname in used:
+                    count += 1
+                    arcname = f"{name} ({count})_Sources.xlsx"
+                used.add(arcname)
+                zip_file.writestr(arcname, data)
+        return buffer.getvalue(), all_sources
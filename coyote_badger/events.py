@@ -0,0 +1,96 @@
+import json
+from queue import Empty, SimpleQueue
+from threading import Lock
+
+from coyote_badger.config import EVENTS_KEEPALIVE, MAX_EVENT_STREAMS
+
+
+class EventStream(object):
+    def __init__(self, keepalive=EVENTS_KEEPALIVE, max_listeners=MAX_EVENT_STREAMS):
+        """Creates a new EventStream.
+
+        Broadcasts events to listeners on any number of channels (e.g.
+        one channel per project), as Server-Sent Events. Each listener
+        gets its own queue, so a slow tab never holds up the others or
+        the thread publishing the events.
+        :param keepalive: The seconds between keepalive comments when
+            there are no events
+        :type keepalive: float
+        :param max_listeners: The most listeners at once, across all of
+            the channels
+        :type max_listeners: int
+        """
+        self.keepalive = keepalive
+        self.max_listeners = max_listeners
+        self._listeners = {}  # channel -> set of queues
+        self._count = 0
+        self._lock = Lock()
+
+    def publish(self, channel, event, data):
+        """Sends an event to every listener of a channel.
+
+        :param channel: The channel to send the event on
+        :type channel: str
+        :param event: The type of the event
+        :type event: str
+        :param data: The json-serializable data of the event
+        :type data: dict
+        """
+        with self._lock:
+            queues = list(self._listeners.get(channel, ()))
+        for queue in queues:
+            queue.put((event, data))
+
+    def subscribe(self, channel):
+        """Starts listening to a channel.
+
+        :param channel: The channel to listen to
+        :type channel: str
+        :returns: The queue the events will be put on, or None if there
+            are already max_listeners
+        :rtype: {SimpleQueue}
+        """
+        queue = SimpleQueue()
+        with self._lock:
+            if self._count >= self.max_listeners:
+                return None
+            self._listeners.setdefault(channel, set()).add(queue)
+            self._count += 1
+        return queue
+
+    def unsubscribe(self, channel, queue):
+        """Stops listening to a channel.
+
+        :param channel: The channel that was listened to
+        :type channel: str
+        :param queue: The queue returned by subscribe()
+        :type queue: SimpleQueue
+        """
+        with self._lock:
+            queues = self._listeners.get(channel)
+            if queues is None or queue not in queues:
+                return
+            queues.remove(queue)
+            self._count -= 1
+            if not queues:
+                del self._listeners[channel]
+
+    def stream(self, queue):
+        """Streams the events of a listener in the Server-Sent Events format.
+
+        A keepalive comment is sent when there have been no events for
+        a while, so that a closed connection is noticed even when
+        nothing is happening. The caller unsubscribes the queue once
+        the stream is closed, even if it was never started.
+        :param queue: The queue returned by subscribe()
+        :type queue: SimpleQueue
+        :returns: A generator of the Server-Sent Events messages
+        :rtype: {generator}
+        """
+        while True:
+            try:
+                event, data = queue.get(timeout=self.keepalive)
+            except Empty:
+                yield ": keepalive\n\n"
+                continue
+            yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
@@ -0,0 +1,113 @@
+import time
+from threading import Condition, Thread
+
+from coyote_badger.config import FLUSH_EVERY, FLUSH_INTERVAL
+from coyote_badger.project import Project
+
+
+class Flusher(object):
+    def __init__(self, every=FLUSH_EVERY, interval=FLUSH_INTERVAL):
+        """Creates a new Flusher.
+
+        Pull results are saved to each project's database as soon as
+        they come in (every save is its own committed transaction), so
+        they survive a crash. The Flusher writes them back to the
+        Sources.xlsx file in the background, coalescing many results
+        into one workbook save: a project is flushed once it has
+        ``every`` pending results, or ``interval`` seconds after its
+        first pending result, whichever comes first.
+        :param every: The number of results that triggers a flush
+        :type every: int
+        :param interval: The most seconds a result waits to be flushed
+        :type interval: float
+        """
+        self.every = every
+        self.interval = interval
+        self._pending = {}  # project name -> (count, time of first result)
+        self._condition = Condition()
+        self._stopped = False
+        self._thread = None
+
+    def start(self):
+        """Starts flushing in a background thread.
+
+        Before anything else, the thread recovers any results that
+        were saved but never flushed (e.g. if the app was killed).
+        """
+        self._stopped = False
+        self._thread = Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Flushes every pending project and stops the thread."""
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def notify(self, project_name):
+        """Records that a project has a new result to flush.
+
+        :param project_name: The name of the project
+        :type project_name: str
+        """
+        with self._condition:
+            count, since = self._pending.get(project_name, (0, time.monotonic()))
+            self._pending[project_name] = (count + 1, since)
+            self._condition.notify()
+
+    def _due(self):
+        """Gets the projects that should be flushed now.
+
+        :returns: The names of the projects
+        :rtype: {[str]}
+        """
+        if self._stopped:
+            return list(self._pending)
+        now = time.monotonic()
+        return [
+            name
+            for name, (count, since) in self._pending.items()
+            if count >= self.every or now - since >= self.interval
+        ]
+
+    def _wait_time(self):
+        """Gets how long to wait until the next project is due.
+
+        :returns: The seconds to wait, or None to wait for a notify
+        :rtype: {float}
+        """
+        if not self._pending:
+            return None
+        now = time.monotonic()
+        since = min(since for _, since in self._pending.values())
+        return max(0, self.interval - (now - since))
+
+    def _flush(self, project_name):
+        try:
+            project = Project.get_project(project_name)
+            if project:
+                project.sync_sources_file()
+        except Exception as e:
+            print(str(e))
+
+    def _run(self):
+        try:
+            Project.sync_projects()
+        except Exception as e:
+            print(str(e))
+        while True:
+            with self._condition:
+                due = self._due()
+                while not due and not self._stopped:
+                    self._condition.wait(timeout=self._wait_time())
+                    due = self._due()
+                for name in due:
+                    del self._pending[name]
+                stopped = self._stopped
+            for name in due:
+                self._flush(name)
+            if stopped:
+                return
@@ -0,0 +1,150 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from coyote_badger import utils
+from coyote_badger.config import OPTIMIZE_IMAGE_DPI, OPTIMIZE_PDFS, PIPELINE_WORKERS
+
+
+class Pipeline(object):
+    def __init__(
+        self,
+        max_workers=PIPELINE_WORKERS,
+        optimize=OPTIMIZE_PDFS,
+        image_dpi=OPTIMIZE_IMAGE_DPI,
+    ):
+        """Creates a new post-processing Pipeline.
+
+        The Pipeline runs the CPU-heavy PDF work that happens after a
+        source is downloaded (stripping cover pages, merging, image
+        conversion) on a pool of worker processes. This lets the
+        browser move on to the next source while the previous one is
+        still being written to the pull folder.
+
+        If ``optimize`` is set, every job's output PDF also goes
+        through utils.optimize_pdf() in the same worker, and the bytes
+        it saved are returned with the job's result.
+        :param max_workers: The number of worker processes
+        :type max_workers: int
+        :param optimize: Whether to optimize the output PDFs
+        :type optimize: bool
+        :param image_dpi: The resolution to downsample raster PDFs to
+        :type image_dpi: int
+        """
+        self.max_workers = max_workers
+        self.optimize = optimize
+        self.image_dpi = image_dpi
+        self._executor = None
+
+    @property
+    def executor(self):
+        if not self._executor:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    def submit(self, fn, *args):
+        """Submits a post-processing job to the worker pool.
+
+        :param fn: The module-level job function to run, which
+            returns the path of the PDF it wrote
+        :type fn: function
+        :returns: The future of the job, whose result is the path of
+            the PDF and the bytes optimizing saved (None if it wasn't
+            optimized)
+        :rtype: {Future}
+        """
+        return self.executor.submit(_run, fn, args, self.optimize, self.image_dpi)
+
+    def shutdown(self, wait=True):
+        """Stops the worker pool.
+
+        :param wait: Whether to wait for pending jobs, defaults to True
+        :type wait: bool, optional
+        """
+        if self._executor:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+
+def _run(fn, args, optimize, image_dpi):
+    """Runs a job in a worker, then optimizes its output if enabled.
+
+    A failed optimization is only reported, since the job's output
+    is still a good PDF.
+    :returns: The path of the PDF, and the bytes optimizing saved
+    :rtype: {(str, int)}
+    """
+    out_path = fn(*args)
+    saved = None
+    if optimize and out_path:
+        try:
+            before, after = utils.optimize_pdf(out_path, image_dpi)
+        except Exception as e:
+            print(str(e))
+        else:
+            saved = before - after
+    return out_path, saved
+
+
+def _remove_all(paths):
+    for path in paths:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def written(out_path):
+    """A job for PDFs that were already written to the pull folder.
+
+    Lets sources that need no post-processing still go through the
+    pipeline's optimization stage.
+    :param out_path: The final path of the PDF
+    :type out_path: str
+    :returns: The final path of the PDF
+    :rtype: {str}
+    """
+    return out_path
+
+
+def strip_cover_page(data, out_path):
+    """Removes the Hein cover page and writes the PDF into place.
+
+    :param data: The contents of the downloaded PDF
+    :type data: bytes
+    :param out_path: The final path of the PDF
+    :type out_path: str
+    :returns: The final path of the PDF
+    :rtype: {str}
+    """
+    return merge_hein_parts([data], out_path)
+
+
+def merge_hein_parts(parts, out_path):
+    """Removes the Hein cover pages of each part and merges them.
+
+    The parts are merged in memory and the result is written to the
+    pull folder once.
+    :param parts: The contents of the downloaded PDFs, in order
+    :type parts: [bytes]
+    :param out_path: The final path of the merged PDF
+    :type out_path: str
+    :returns: The final path of the PDF
+    :rtype: {str}
+    """
+    utils.merge_without_first_pages(parts, out_path)
+    return out_path
+
+
+def convert_screenshot(staged_path, out_path):
+    """Converts a website screenshot to a PDF and moves it into place.
+
+    :param staged_path: The path of the screenshot image
+    :type staged_path: str
+    :param out_path: The final path of the PDF
+    :type out_path: str
+    :returns: The final path of the PDF
+    :rtype: {str}
+    """
+    try:
+        utils.img2pdf(staged_path, out_path)
+    finally:
+        _remove_all([staged_path])
+    return out_path
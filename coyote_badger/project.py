@@ -1,27 +1,223 @@
 import os
 import shutil
-
-from openpyxl import load_workbook
-from openpyxl.styles import Alignment
-
-from coyote_badger.config import CONVERTER_FOLDER_PREFIX, PROJECTS_FOLDER
+import sqlite3
+import time
+import weakref
+from collections import OrderedDict
+from threading import Lock, RLock
+
+from coyote_badger.catalog import Catalog
+from coyote_badger.config import (
+    CONVERTER_FOLDER_PREFIX,
+    PROJECT_CACHE_SIZE,
+    PROJECTS_FOLDER,
+)
 from coyote_badger.source import Header, Kind, Source
-from coyote_badger.utils import clean_string
+from coyote_badger.utils import atomic_write, clean_string
 
 SOURCE_SHEET = "Sources"
 HEADER_ROW = 2
 DATA_START_ROW = HEADER_ROW + 1
 
+SOURCES_DB = "sources.db"
+# The Source fields stored in the database, in column order
+FIELDS = [
+    Header.fn_num.name,
+    Header.long_cite.name,
+    Header.short_cite.name,
+    Header.filename.name,
+    Header.library.name,
+    Header.has_book.name,
+    Header.kind.name,
+    Header.result.name,
+]
+# The Source fields shown on the front-end, see Source.to_json()
+JSON_FIELDS = [
+    Header.long_cite.name,
+    Header.short_cite.name,
+    Header.filename.name,
+    Header.kind.name,
+    Header.result.name,
+]
+CREATE_TABLES = """
+    CREATE TABLE IF NOT EXISTS sources (
+        id INTEGER PRIMARY KEY,
+        fn_num,
+        long_cite TEXT,
+        short_cite TEXT,
+        filename TEXT,
+        library TEXT,
+        has_book TEXT,
+        kind TEXT,
+        result TEXT,
+        dirty INTEGER NOT NULL DEFAULT 0  -- unsynced changes to the row
+    );
+    CREATE INDEX IF NOT EXISTS sources_dirty ON sources (dirty);
+    CREATE TABLE IF NOT EXISTS meta (
+        key TEXT PRIMARY KEY,
+        value TEXT
+    );
+"""
+# Saves every field of a source as given, including empty ones
+UPSERT_SOURCE = """
+    INSERT INTO sources (id, {columns}, dirty)
+    VALUES (?, {placeholders}, 1)
+    ON CONFLICT (id) DO UPDATE SET {updates}, dirty = dirty + 1
+""".format(
+    columns=", ".join(FIELDS),
+    placeholders=", ".join("?" for _ in FIELDS),
+    updates=", ".join(f"{f} = excluded.{f}" for f in FIELDS),
+)
+# Imports a row of the sheet, unless the stored row has changes that
+# haven't been written to the sheet yet
+IMPORT_SOURCE = """
+    INSERT INTO sources (id, {columns})
+    VALUES (?, {placeholders})
+    ON CONFLICT (id) DO UPDATE SET {updates} WHERE dirty = 0
+""".format(
+    columns=", ".join(FIELDS),
+    placeholders=", ".join("?" for _ in FIELDS),
+    updates=", ".join(f"{f} = excluded.{f}" for f in FIELDS),
+)
+
+# Serializes writes to Sources.xlsx files, which happen from both
+# request handlers and the background Flusher. Always taken after a
+# Project's own lock, never before.
+sync_lock = Lock()
+
+# Open projects by name, least recently used first
+project_cache = OrderedDict()
+project_cache_lock = Lock()
+# Held while a project is being (re)opened, one per project name, so
+# that opening one project doesn't hold up requests for the others
+project_open_locks = {}
+
+# The summary of every project, kept up to date by the projects
+catalog = Catalog()
+
+
+def file_signature(path):
+    """A signature of a file on disk.
+
+    Used to tell if a Sources.xlsx file was changed since it was last
+    imported or written back.
+    :param path: The path of the file
+    :type path: str
+    :returns: The modified time and size of the file
+    :rtype: {str}
+    """
+    stat = os.stat(path)
+    return f"{stat.st_mtime_ns}:{stat.st_size}"
+
+
+def _close_db(lock, db):
+    """Closes the database connection of a project.
+
+    :param lock: The project's lock
+    :type lock: RLock
+    :param db: The project's database connection
+    :type db: sqlite3.Connection
+    """
+    with lock:
+        db.close()
+
+
+def clean_sheet(ws):
+    """Cleans a Sources worksheet.
+
+    Removes extraneous characters, empty rows, and None values.
+    Consecutive empty rows are deleted together, since every
+    delete_rows() call scans the whole sheet.
+    :param ws: The Sources worksheet
+    :type ws: Worksheet
+    """
+    delete_rows = []
+    for row in ws.iter_rows(min_row=DATA_START_ROW):
+        # Clean the strings
+        for cell in row:
+            if isinstance(cell.value, str):
+                cell.value = cell.value or ""
+                cell.value = clean_string(cell.value)
+        # Keep track of blank rows
+        values = [cell.value for cell in row]
+        if not any(values):
+            delete_rows.append(row[0].row)
+    # Group the blank rows into runs of [first row, count]
+    runs = []
+    for index in delete_rows:
+        if runs and runs[-1][0] + runs[-1][1] == index:
+            runs[-1][1] += 1
+        else:
+            runs.append([index, 1])
+    # Delete blank rows
+    for index, amount in reversed(runs):
+        ws.delete_rows(index, amount)
+
+
+def fill_row(row, source, header_index):
+    """Fills a worksheet's row with data from a provided source.
+
+    :param row: The cells of the row to fill in
+    :type row: [Cell]
+    :param source: The source to use for data
+    :type source: Source
+    :param header_index: Mapping of Header value to column index
+    :type header_index: dict(str -> int)
+    :returns: The new row values
+    :rtype: {[Cell]}
+    """
+    from openpyxl.styles import Alignment
+
+    # Style objects are immutable, so the row's wrapped cells share one
+    wrap_text = Alignment(wrap_text=True)
+    for cell in row:
+        if cell.col_idx == header_index[Header.fn_num.value]:
+            cell.value = source.fn_num
+            cell.number_format = "0.00"
+        elif cell.col_idx == header_index[Header.long_cite.value]:
+            cell.value = source.long_cite or None
+            cell.alignment = wrap_text
+        elif cell.col_idx == header_index[Header.short_cite.value]:
+            if source.kind == Kind.WEBSITE:
+                cell.hyperlink = source.short_cite
+                cell.style = "Hyperlink"
+            cell.value = source.short_cite or None
+            cell.alignment = wrap_text
+        elif cell.col_idx == header_index[Header.filename.value]:
+            cell.value = source.filename or None
+            cell.alignment = wrap_text
+        elif cell.col_idx == header_index[Header.kind.value]:
+            cell.value = source.kind.value
+        elif cell.col_idx == header_index[Header.result.value]:
+            cell.value = source.result.value
+    return row
+
 
 class Project(object):
     def __init__(self, name, xls_file=None):
+        """Opens (or creates) a project.
+
+        A project's sources are stored in an SQLite database in the
+        project folder, so saving a source only updates its own row.
+        The Sources.xlsx file is imported into the database the first
+        time the project is opened (or whenever it was changed outside
+        of Coyote Badger), and changes are written back to it by
+        sync_sources_file().
+        :param name: The name of the project
+        :type name: str
+        :param xls_file: The sources file to create the project
+            with, defaults to None (open an existing project)
+        :type xls_file: FileStorage or Workbook, optional
+        """
         self.name = name
         self.project_folder = os.path.join(PROJECTS_FOLDER, name)
         self.project_folder_exists = os.path.isdir(self.project_folder)
         self.pull_folder = os.path.join(self.project_folder, "pull")
         self.pull_folder_exists = os.path.isdir(self.pull_folder)
+        self.staging_folder = os.path.join(self.project_folder, ".staging")
         self.sources_file = os.path.join(self.project_folder, "Sources.xlsx")
         self.sources_file_exists = os.path.isfile(self.sources_file)
+        self.db_file = os.path.join(self.project_folder, SOURCES_DB)
 
         # Create the data folders if the project doesn't exist
         if not self.pull_folder_exists:
@@ -31,15 +227,49 @@ class Project(object):
         if not self.sources_file_exists:
             xls_file.save(self.sources_file)
 
-        self.wb = load_workbook(self.sources_file)
-        self.ws = self.wb[SOURCE_SHEET]
-        self.headers = self.ws[HEADER_ROW]
+        self._wb = None
+        self._wb_signature = None
         self._header_index = None
+        self._columns = None
+        # Cached projects are shared between threads, so their
+        # database connection is only used while holding this lock
+        self._lock = RLock()
+        self.db = sqlite3.connect(self.db_file, check_same_thread=False)
+        self.db.row_factory = sqlite3.Row
+        # Close the connection once the project is no longer used: when
+        # it was evicted from (or replaced in) the project cache and the
+        # last request or pull holding it is done with it
+        weakref.finalize(self, _close_db, self._lock, self.db)
+        self.db.executescript(CREATE_TABLES)
 
         # If we are creating this project for the first time, clean it
         if xls_file:
             self.clean_wb()
 
+        # Import the sources file if it's new or was edited elsewhere
+        if self.get_meta("signature") != self.sources_file_signature():
+            self.import_sources_file()
+
+    @property
+    def wb(self):
+        # Reload if the file was written since, e.g. by another Project
+        signature = self.sources_file_signature()
+        if self._wb is None or self._wb_signature != signature:
+            # openpyxl is slow to import, and most pages never need it
+            from openpyxl import load_workbook
+
+            self._wb = load_workbook(self.sources_file)
+            self._wb_signature = signature
+        return self._wb
+
+    @property
+    def ws(self):
+        return self.wb[SOURCE_SHEET]
+
+    @property
+    def headers(self):
+        return self.ws[HEADER_ROW]
+
     @property
     def header_index(self):
         """A property containing a mapping of our known
@@ -52,20 +282,201 @@ class Project(object):
         """
         if self._header_index is not None:
             return self._header_index
-        index = {}
-        for cell in self.headers:
-            if cell.value in set(item.value for item in Header):
-                index[cell.value] = cell.column  # column is 1-indexed
-        self._header_index = index
+        self._header_index = self.index_headers(cell.value for cell in self.headers)
         return self._header_index
 
+    @property
+    def columns(self):
+        """A property containing a mapping of the Source fields to
+        what column they are at in a row of values.
+
+        Precomputed from header_index so that building a source from
+        a row is a plain list lookup per field.
+        :returns: Mapping of Source field name to column index (0-indexed)
+        :rtype: {dict(str -> int)}
+        """
+        if self._columns is None:
+            self._columns = {
+                item.name: self.header_index[item.value] - 1 for item in Header
+            }
+        return self._columns
+
+    @staticmethod
+    def index_headers(values):
+        """Maps the known Headers in a header row to their column index.
+
+        :param values: The values of the header row
+        :type values: [str]
+        :returns: Mapping of Header value to column index (1-indexed)
+        :rtype: {dict(str -> int)}
+        """
+        headers = set(item.value for item in Header)
+        index = {}
+        for column, value in enumerate(values, start=1):
+            if value in headers:
+                index[value] = column
+        return index
+
     def delete(self):
         """Deletes a project.
 
         Removes the project foler, along with it's pulled source
         pdfs and it's Sources.xlsx file.
         """
+        with project_cache_lock:
+            if project_cache.get(self.name) is self:
+                del project_cache[self.name]
+        with self._lock:
+            self.db.close()
         shutil.rmtree(self.project_folder, ignore_errors=True)
+        catalog.remove(self.name)
+
+    def update_catalog(self, updated=None):
+        """Updates the project's entry in the catalog.
+
+        The counts are aggregated from the project's database, and the
+        pulled bytes from its pull folder, so no workbook is opened.
+        :param updated: The time of the project's last activity,
+            defaults to None (now, for sources that were just saved or
+            pulled)
+        :type updated: float, optional
+        """
+        with self._lock:
+            results = dict(
+                self.db.execute(
+                    "SELECT result, COUNT(*) FROM sources GROUP BY result"
+                ).fetchall()
+            )
+            kinds = dict(
+                self.db.execute(
+                    "SELECT kind, COUNT(*) FROM sources GROUP BY kind"
+                ).fetchall()
+            )
+        pulled_bytes = 0
+        with os.scandir(self.pull_folder) as entries:
+            for entry in entries:
+                if not entry.name.startswith(".") and entry.is_file():
+                    pulled_bytes += entry.stat().st_size
+        if updated is None:
+            updated = time.time()
+        catalog.update(
+            self.name, sum(results.values()), results, kinds, pulled_bytes, updated
+        )
+
+    def last_activity(self):
+        """Gets the time of the project's last activity on disk.
+
+        That is when its Sources.xlsx file was last written, or a file
+        was last pulled into (or removed from) its pull folder, for
+        projects whose activity wasn't seen by this app (e.g. from
+        before the catalog, or edited elsewhere).
+        :returns: The time of the last activity
+        :rtype: {float}
+        """
+        return max(
+            os.path.getmtime(self.sources_file), os.path.getmtime(self.pull_folder)
+        )
+
+    def get_meta(self, key):
+        """Gets a value from the project's metadata table.
+
+        :param key: The key of the value
+        :type key: str
+        :returns: The value, or None if it isn't set
+        :rtype: {str}
+        """
+        with self._lock:
+            row = self.db.execute("SELECT value FROM meta WHERE key = ?", (key,))
+            row = row.fetchone()
+        return row["value"] if row else None
+
+    def set_meta(self, key, value):
+        """Sets a value in the project's metadata table.
+
+        :param key: The key of the value
+        :type key: str
+        :param value: The value
+        :type value: str
+        """
+        with self._lock:
+            self.db.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value)
+            )
+
+    def sources_file_signature(self):
+        """A signature of the Sources.xlsx file on disk.
+
+        Used to tell if the file was changed since it was last imported
+        or written back.
+        :returns: The modified time and size of the file
+        :rtype: {str}
+        """
+        return file_signature(self.sources_file)
+
+    def import_sources_file(self):
+        """Imports the Sources.xlsx file into the database.
+
+        Replaces the sources in the database with the rows of the
+        sheet. The sheet is streamed in read-only mode, one row of
+        values at a time, rather than parsed into a full workbook.
+
+        Sources that were saved but not yet written back to the sheet
+        (e.g. pull results waiting on the Flusher, or left behind by a
+        crash) are kept as stored, and stay dirty so the next sync
+        writes them to it. Every other row is replaced as it is in the
+        sheet, including its empty cells.
+        """
+        from openpyxl import load_workbook
+
+        with self._lock:
+            wb = load_workbook(self.sources_file, read_only=True)
+            try:
+                rows = wb[SOURCE_SHEET].iter_rows(min_row=HEADER_ROW, values_only=True)
+                self._header_index = self.index_headers(next(rows, ()))
+                self._columns = None
+                records = []
+                for index, values in enumerate(rows, start=1):
+                    source = self.build_source_from_values(values)
+                    records.append((index, *self._to_record(source)))
+            finally:
+                wb.close()
+            with self.db:
+                self.db.execute(
+                    "DELETE FROM sources WHERE id > ? AND dirty = 0", (len(records),)
+                )
+                self.db.executemany(IMPORT_SOURCE, records)
+                self.set_meta("signature", self.sources_file_signature())
+        self.update_catalog(self.last_activity())
+
+    def sync_sources_file(self):
+        """Writes changed sources back to the Sources.xlsx file.
+
+        Only the rows that changed since the last sync are rewritten,
+        and the workbook is saved once. A row that changes again while
+        the workbook is being written stays dirty for the next sync.
+        :returns: Whether or not anything was written
+        :rtype: {bool}
+        """
+        with self._lock, sync_lock:
+            records = self.db.execute("SELECT * FROM sources WHERE dirty > 0")
+            records = records.fetchall()
+            if not records:
+                return False
+            ws = self.ws
+            for record in records:
+                row = ws[HEADER_ROW + record["id"]]
+                source = self.build_source_from_record(record)
+                self.build_row_from_source(row, source)
+            with atomic_write(self.sources_file) as temp_path:
+                self.wb.save(temp_path)
+            self._wb_signature = self.sources_file_signature()
+            with self.db:
+                self.db.executemany(
+                    "UPDATE sources SET dirty = 0 WHERE id = ? AND dirty = ?",
+                    [(record["id"], record["dirty"]) for record in records],
+                )
+                self.set_meta("signature", self._wb_signature)
+        return True
 
     @staticmethod
     def get_projects():
@@ -82,66 +493,246 @@ class Project(object):
                 projects.append(item)
         return projects
 
+    @staticmethod
+    def sync_projects():
+        """Writes every project's changed sources back to its Sources.xlsx.
+
+        Also brings the catalog in line with the projects folder.
+
+        :returns: The names of the projects that were written
+        :rtype: {[str]}
+        """
+        synced = []
+        names = Project.get_projects()
+        catalog.retain(names)
+        cataloged = catalog.get_names()
+        for name in names:
+            project = Project.get_project(name)
+            if not project:
+                continue
+            if project.sync_sources_file():
+                synced.append(name)
+            # Add projects from before the catalog, or copied in by hand
+            if name not in cataloged:
+                project.update_catalog(project.last_activity())
+        return synced
+
     @staticmethod
     def get_project(name):
         """Gets a project by name.
 
-        An alternative way of getting a project by its name.
+        An alternative way of getting a project by its name. Open
+        projects are kept in a cache (up to PROJECT_CACHE_SIZE, least
+        recently used are evicted first) and are only reopened when
+        their Sources.xlsx file was changed outside of Coyote Badger.
+        A project is opened without holding the cache lock, since it
+        may import its whole Sources.xlsx file first.
         :param name: The name of the project to get
         :type name: str
         :returns: The project
         :rtype: {Project}
         """
-        if name in Project.get_projects():
-            return Project(name)
-        return None
+        # Only folders directly in the projects folder are projects
+        if (
+            not name
+            or name != os.path.basename(name)
+            or name in (os.curdir, os.pardir)
+            or name.startswith(CONVERTER_FOLDER_PREFIX)
+        ):
+            return None
+        sources_file = os.path.join(PROJECTS_FOLDER, name, "Sources.xlsx")
+        with project_cache_lock:
+            open_lock = project_open_locks.setdefault(name, Lock())
+        with open_lock:
+            try:
+                signature = file_signature(sources_file)
+            except OSError:
+                signature = None
+            with project_cache_lock:
+                project = project_cache.get(name)
+                if signature is None:
+                    project_cache.pop(name, None)
+                    return None
+                if project is not None:
+                    project_cache.move_to_end(name)
+            if project is not None and project.get_meta("signature") == signature:
+                return project
+            project = Project(name)
+            # Projects that are replaced or evicted close their database
+            # once nothing else holds them, see Project()
+            with project_cache_lock:
+                project_cache[name] = project
+                project_cache.move_to_end(name)
+                while len(project_cache) > PROJECT_CACHE_SIZE:
+                    project_cache.popitem(last=False)
+        return project
 
     def get_sources(self):
-        """Gets all the sources in the Sources.xlsx.
+        """Gets all the sources in the project.
 
         :returns: A list of the sources
         :rtype: {[Source]}
         """
-        sources = []
-        for row in self.ws.iter_rows(min_row=DATA_START_ROW):
-            source_index = row[0].row - HEADER_ROW
-            source = self.get_source(source_index)
-            sources.append(source)
-        return sources
+        with self._lock:
+            records = self.db.execute("SELECT * FROM sources ORDER BY id")
+            records = records.fetchall()
+        return [self.build_source_from_record(record) for record in records]
+
+    @staticmethod
+    def _filter_sources(kinds=None, results=None):
+        """Builds the WHERE clause that filters sources by Kind and Result.
+
+        :param kinds: The Kind values to keep, defaults to None (all)
+        :type kinds: [str], optional
+        :param results: The Result values to keep, defaults to None (all)
+        :type results: [str], optional
+        :returns: The WHERE clause, and its parameters
+        :rtype: {(str, list)}
+        """
+        conditions = []
+        params = []
+        for field, values in (("kind", kinds), ("result", results)):
+            if values:
+                placeholders = ", ".join("?" for _ in values)
+                conditions.append(f"{field} IN ({placeholders})")
+                params += values
+        if not conditions:
+            return "", params
+        return "WHERE " + " AND ".join(conditions), params
+
+    def count_sources(self, kinds=None, results=None):
+        """Counts the sources in the project, optionally filtered.
+
+        :param kinds: The Kind values to count, defaults to None (all)
+        :type kinds: [str], optional
+        :param results: The Result values to count, defaults to None (all)
+        :type results: [str], optional
+        :returns: The number of sources
+        :rtype: {int}
+        """
+        where, params = self._filter_sources(kinds, results)
+        with self._lock:
+            row = self.db.execute(f"SELECT COUNT(*) FROM sources {where}", params)
+            return row.fetchone()[0]
+
+    def get_sources_page(self, offset=0, limit=None, kinds=None, results=None):
+        """Gets a page of the front-end json of the sources, optionally filtered.
+
+        The stored values were already cleaned and classified when
+        they were saved, so this reads them straight from the database
+        without building a Source for each row.
+        :param offset: The number of matching sources to skip,
+            defaults to 0
+        :type offset: int, optional
+        :param limit: The most sources to get, defaults to None (all)
+        :type limit: int, optional
+        :param kinds: The Kind values to get, defaults to None (all)
+        :type kinds: [str], optional
+        :param results: The Result values to get, defaults to None (all)
+        :type results: [str], optional
+        :returns: The json of each source, along with its row
+            (1-indexed) as ``index``
+        :rtype: {[dict]}
+        """
+        where, params = self._filter_sources(kinds, results)
+        query = 'SELECT id AS "index", {} FROM sources {} ORDER BY id LIMIT ? OFFSET ?'
+        query = query.format(
+            ", ".join(f"COALESCE({field}, '') AS {field}" for field in JSON_FIELDS),
+            where,
+        )
+        params += [-1 if limit is None else limit, offset]
+        with self._lock:
+            records = self.db.execute(query, params).fetchall()
+        return [dict(record) for record in records]
+
+    def get_source_indexes(self, kinds=None, results=None):
+        """Gets the rows of the sources in the project, optionally filtered.
+
+        :param kinds: The Kind values to get, defaults to None (all)
+        :type kinds: [str], optional
+        :param results: The Result values to get, defaults to None (all)
+        :type results: [str], optional
+        :returns: The row of each source (1-indexed)
+        :rtype: {[int]}
+        """
+        where, params = self._filter_sources(kinds, results)
+        with self._lock:
+            records = self.db.execute(
+                f"SELECT id FROM sources {where} ORDER BY id", params
+            ).fetchall()
+        return [record["id"] for record in records]
 
     def get_source(self, index):
-        """Gets a single source from the Sources.xlsx file.
+        """Gets a single source from the project.
 
         :param index: The row the source is at (1-indexed)
         :type index: int
         :returns: The source
         :rtype: {Source}
         """
-        row = self.ws[HEADER_ROW + index]
-        source = self.build_source_from_row(row)
-        return source
+        with self._lock:
+            record = self.db.execute("SELECT * FROM sources WHERE id = ?", (index,))
+            record = record.fetchone()
+        if not record:
+            return Source()
+        return self.build_source_from_record(record)
 
     def save_sources(self, sources):
-        """Saves all the provided sources back to the Sources.xlsx file.
+        """Saves all the provided sources, then syncs the Sources.xlsx file.
 
         :param sources: The sources to save
         :type sources: [Sources]
         """
-        for i, source in enumerate(sources):
-            self.save_source(i + 1, source)
-        self.wb.save(self.sources_file)
+        with self._lock, self.db:
+            self.db.executemany(
+                UPSERT_SOURCE,
+                [(i + 1, *self._to_record(source)) for i, source in enumerate(sources)],
+            )
+        self.update_catalog()
+        self.sync_sources_file()
 
     def save_source(self, index, source):
-        """Saves a single source back to the Sources.xslx file.
+        """Saves a single source to the project.
 
+        Only the source's row in the database is updated; the
+        Sources.xlsx file is synced later.
         :param index: The row of the source to save (1-indexed)
         :type index: int
         :param source: The source to save
         :type source: Source
         """
-        row = self.ws[HEADER_ROW + index]
-        self.build_row_from_source(row, source)
-        self.wb.save(self.sources_file)
+        with self._lock, self.db:
+            self.db.execute(UPSERT_SOURCE, (index, *self._to_record(source)))
+        self.update_catalog()
+
+    def patch_sources(self, patch):
+        """Saves the changed fields of some sources.
+
+        Only the given fields of the given rows are updated, all in one
+        transaction, and each is set to exactly the value sent (an empty
+        value clears the field). Like save_source(), the Sources.xlsx file is synced
+        later.
+        :param patch: Mapping of row (1-indexed) to the changed fields
+            of its source, in the front-end json format
+        :type patch: dict(int -> dict(str -> str))
+        """
+        updates = []
+        for index, data in patch.items():
+            # Clean and validate the values the same way as a full save
+            source = Source.from_json(data)
+            record = dict(zip(FIELDS, self._to_record(source)))
+            fields = [field for field in JSON_FIELDS if field in data]
+            if fields:
+                updates.append((index, fields, [record[field] for field in fields]))
+        with self._lock, self.db:
+            for index, fields, values in updates:
+                self.db.execute(
+                    "UPDATE sources SET {}, dirty = dirty + 1 WHERE id = ?".format(
+                        ", ".join(f"{field} = ?" for field in fields)
+                    ),
+                    (*values, index),
+                )
+        self.update_catalog()
 
     def save_pull_path(self, filename, extension=None):
         """The path to save a pulled resource at for this project.
@@ -157,6 +748,40 @@ class Project(object):
             filename = f"{filename}.{extension}"
         return os.path.join(self.pull_folder, filename)
 
+    def get_export_files(self):
+        """Gets the files that make up an export of this project.
+
+        Includes the Sources.xlsx file and every pulled file, skipping
+        hidden files such as ones that are still being written.
+        :returns: The (path, name in archive) pairs to export
+        :rtype: {[(str, str)]}
+        """
+        self.sync_sources_file()
+        files = [(self.sources_file, os.path.basename(self.sources_file))]
+        for filename in sorted(os.listdir(self.pull_folder)):
+            path = os.path.join(self.pull_folder, filename)
+            if filename.startswith(".") or not os.path.isfile(path):
+                continue
+            files.append((path, "pull/{}".format(filename)))
+        return files
+
+    def save_staging_path(self, filename, extension=None):
+        """The path to stage an intermediate file at for this project.
+
+        Staged files are raw downloads and screenshots that still
+        need post-processing before they are moved to the pull folder.
+        :param filename: The name of the file to be staged
+        :type filename: str
+        :param extension: The extension of the file, defaults to None
+        :type extension: str, optional
+        :returns: The path the file should be staged at
+        :rtype: {str}
+        """
+        os.makedirs(self.staging_folder, exist_ok=True)
+        if extension:
+            filename = f"{filename}.{extension}"
+        return os.path.join(self.staging_folder, filename)
+
     def build_source_from_row(self, row):
         """Builds a source given a row.
 
@@ -165,16 +790,51 @@ class Project(object):
         :returns: The source that was generated from this data
         :rtype: {Source}
         """
-        values = [c.value for c in row]
+        return self.build_source_from_values([c.value for c in row])
+
+    def build_source_from_values(self, values):
+        """Builds a source given the values of a row.
+
+        :param values: The values of the row in the excel
+        :type values: [object]
+        :returns: The source that was generated from this data
+        :rtype: {Source}
+        """
+        count = len(values)
         return Source(
-            fn_num=values[self.header_index[Header.fn_num.value] - 1],
-            long_cite=values[self.header_index[Header.long_cite.value] - 1],
-            short_cite=values[self.header_index[Header.short_cite.value] - 1],
-            filename=values[self.header_index[Header.filename.value] - 1],
-            library=values[self.header_index[Header.library.value] - 1],
-            has_book=values[self.header_index[Header.has_book.value] - 1],
-            kind=values[self.header_index[Header.kind.value] - 1],
-            result=values[self.header_index[Header.result.value] - 1],
+            **{
+                field: values[column] if column < count else None
+                for field, column in self.columns.items()
+            }
+        )
+
+    def build_source_from_record(self, record):
+        """Builds a source given a database record.
+
+        :param record: The row in the sources table
+        :type record: sqlite3.Row
+        :returns: The source that was generated from this data
+        :rtype: {Source}
+        """
+        return Source(**{field: record[field] for field in FIELDS})
+
+    def _to_record(self, source):
+        """Gets the values of a source to store in the database.
+
+        :param source: The source
+        :type source: Source
+        :returns: The values, in the order of FIELDS
+        :rtype: {tuple}
+        """
+        return (
+            source.fn_num,
+            source.long_cite,
+            source.short_cite,
+            source.filename,
+            source.library,
+            source.has_book,
+            source.kind.value,
+            source.result.value,
         )
 
     def build_row_from_source(self, row, source):
@@ -187,27 +847,7 @@ class Project(object):
         :returns: The new row values
         :rtype: {[Cell]}
         """
-        for cell in row:
-            if cell.col_idx == self.header_index[Header.fn_num.value]:
-                cell.value = source.fn_num or cell.value
-                cell.number_format = "0.00"
-            elif cell.col_idx == self.header_index[Header.long_cite.value]:
-                cell.value = source.long_cite or cell.value
-                cell.alignment = Alignment(wrap_text=True)
-            elif cell.col_idx == self.header_index[Header.short_cite.value]:
-                if source.kind == Kind.WEBSITE:
-                    cell.hyperlink = source.short_cite
-                    cell.style = "Hyperlink"
-                cell.value = source.short_cite or cell.value
-                cell.alignment = Alignment(wrap_text=True)
-            elif cell.col_idx == self.header_index[Header.filename.value]:
-                cell.value = source.filename or cell.value
-                cell.alignment = Alignment(wrap_text=True)
-            elif cell.col_idx == self.header_index[Header.kind.value]:
-                cell.value = source.kind.value or cell.value
-            elif cell.col_idx == self.header_index[Header.result.value]:
-                cell.value = source.result.value or cell.value
-        return row
+        return fill_row(row, source, self.header_index)
 
     def clean_wb(self):
         """Cleans a workbook.
@@ -215,18 +855,5 @@ class Project(object):
         Removes extraneous characters, empty rows,
         and None values from a Sources workbook.
         """
-        delete_rows = []
-        for row in self.ws.iter_rows(min_row=DATA_START_ROW):
-            # Clean the strings
-            for cell in row:
-                if isinstance(cell.value, str):
-                    cell.value = cell.value or ""
-                    cell.value = clean_string(cell.value)
-            # Keep track of blank rows
-            values = [cell.value for cell in row]
-            if not any(values):
-                delete_rows.append(row[0].row)
-        # Delete blank rows
-        for index in reversed(delete_rows):
-            self.ws.delete_rows(index)
+        clean_sheet(self.ws)
         self.wb.save(self.sources_file)
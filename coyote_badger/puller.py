@@ -1,14 +1,14 @@
 import os
 import re
 import shutil
+import time
 from urllib.parse import quote
 from urllib.request import urlretrieve
 
-from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
-from playwright.sync_api import sync_playwright
-
-from coyote_badger import utils
+from coyote_badger import pipeline, utils
 from coyote_badger.config import PACKAGE_FOLDER
+from coyote_badger.pipeline import Pipeline
+from coyote_badger.scheduler import PullTimings
 from coyote_badger.source import Kind, Result
 
 
@@ -24,6 +24,9 @@ class Puller(object):
         ]
     )
 
+    # The backends whose pages are opened in Chrome, the rest use Firefox
+    CHROME_BACKENDS = ("Website",)
+
     SCREEN_WIDTH = 1200
     SCREEN_HEIGHT = 860
     SLOW_MO = 0.5 * 1000  # 0.5 sec, increase to slow down for debugging
@@ -38,6 +41,12 @@ class Puller(object):
     WESTLAW_SEARCH_URL = "https://1.next.westlaw.com/Search/Home.html?transitionType=Default&contextData=(sc.Default)"  # noqa
     WESTLAW_STATUTES_URL = "https://1.next.westlaw.com/Browse/Home/StatutesCourtRules?transitionType=Default&contextData=(sc.Default)"  # noqa
     WESTLAW_CASES_URL = "https://1.next.westlaw.com/Browse/Home/Cases?transitionType=Default&contextData=(sc.Default)"  # noqa
+    WESTLAW_FIND_URL = "https://1.next.westlaw.com/Link/Document/FullText?findType=Y&cite={}&transitionType=Default&contextData=(sc.Default)"  # noqa
+    # What a citation lookup lands on: the document, a list of results
+    # when the citation is ambiguous, or an error when it is unknown
+    WESTLAW_DOCUMENT = "#co_docHeader #title"
+    WESTLAW_RESULT_LIST = "#co_searchResults, .co_searchResult_list"
+    WESTLAW_NO_RESULTS = "#co_search_noResults, #co_findError, .co_errorPage"
 
     SSRN_SIGN_IN_URL = "https://hq.ssrn.com/login/pubsigninjoin.cfm"
     SSRN_AUTHED_URL = "https://hq.ssrn.com/Library/myLibrary.cfm"
@@ -59,14 +68,36 @@ class Puller(object):
         (https://github.com/microsoft/playwright/issues/2644), so now
         we have to use a mix of Chrome (to load extensions for clean
         website screenshots) and Firefox (to pull Hein, Westlaw, SSRN).
+
+        PDF post-processing (cover page removal, merging, screenshot
+        conversion) is handed off to a Pipeline so the browser is free
+        for the next source. The future of the most recent pull's
+        post-processing is kept in ``postprocessing``.
+
+        While a pull runs, each stage it reaches (searching, downloading,
+        post-processing) is reported to its ``on_stage`` callback. How
+        long each successful pull took is recorded in ``timings``, by
+        Kind, for scheduling later pulls.
+
+        Each backend (Hein, Westlaw, SSRN, websites) keeps one page open
+        that every pull from it navigates, rather than opening and
+        closing a page per source, see _get_page().
         """
         self._playwright = None
         self._chrome = None
         self._firefox = None
+        self.pipeline = Pipeline()
+        self.postprocessing = None
+        self._on_stage = None
+        self.timings = PullTimings()
+        self._pages = {}
 
     @property
     def playwright(self):
         if not self._playwright:
+            # Playwright is slow to import, so wait until a browser is needed
+            from playwright.sync_api import sync_playwright
+
             self._playwright = sync_playwright().start()
         return self._playwright
 
@@ -147,10 +178,58 @@ class Puller(object):
     def timeout(cls, sec):
         return cls.SLOW_MO + sec * 1000
 
+    def _get_page(self, backend):
+        """Gets the page of a backend.
+
+        The page is kept open between uses, so consecutive pulls from
+        the same service reuse its loaded scripts and caches. A page
+        that was closed (e.g. with its browser) or stopped responding
+        is replaced with a new one.
+        :param backend: The backend, e.g. "Hein"
+        :type backend: str
+        :returns: The page
+        :rtype: {Page}
+        """
+        page = self._pages.get(backend)
+        if page and not self._page_healthy(page):
+            self._reset_page(backend)
+            page = None
+        if not page:
+            browser = self.chrome if backend in self.CHROME_BACKENDS else self.firefox
+            page = browser.new_page()
+            self._pages[backend] = page
+        return page
+
+    def _page_healthy(self, page):
+        if page.is_closed():
+            return False
+        # A bounded probe, since a hung page would never answer one
+        try:
+            page.wait_for_function("true", timeout=self.timeout(2))
+        except Exception as e:
+            print(str(e))
+            return False
+        return True
+
+    def _reset_page(self, backend):
+        """Closes the page of a backend, so its next use gets a new one.
+
+        Used when something fails partway through, since the page may be
+        left in a state the next use doesn't expect (e.g. an open popup).
+        :param backend: The backend, e.g. "Hein"
+        :type backend: str
+        """
+        page = self._pages.pop(backend, None)
+        if page and not page.is_closed():
+            try:
+                page.close()
+            except Exception as e:
+                print(str(e))
+
     @property
     def hein_authenticated(self):
         result = False
-        page = self.firefox.new_page()
+        page = self._get_page("Hein")
         try:
             page.goto(self.HEIN_AUTHED_URL, wait_until="networkidle")
             username = page.query_selector("#username")
@@ -160,14 +239,13 @@ class Puller(object):
         except Exception as e:
             print(str(e))
             result = False
-        finally:
-            page.close()
+            self._reset_page("Hein")
         return result
 
     @property
     def westlaw_authenticated(self):
         result = False
-        page = self.firefox.new_page()
+        page = self._get_page("Westlaw")
         try:
             page.goto(self.WESTLAW_AUTHED_URL, wait_until="networkidle")
             username = page.query_selector("#Username")
@@ -177,14 +255,13 @@ class Puller(object):
         except Exception as e:
             print(str(e))
             result = False
-        finally:
-            page.close()
+            self._reset_page("Westlaw")
         return result
 
     @property
     def ssrn_authenticated(self):
         result = False
-        page = self.firefox.new_page()
+        page = self._get_page("SSRN")
         try:
             page.goto(self.SSRN_AUTHED_URL, wait_until="networkidle")
             forgot = page.query_selector('a:has-text("Forgot password")')
@@ -193,8 +270,7 @@ class Puller(object):
         except Exception as e:
             print(str(e))
             result = False
-        finally:
-            page.close()
+            self._reset_page("SSRN")
         return result
 
     @property
@@ -338,6 +414,19 @@ class Puller(object):
         finally:
             page.close()
 
+    def _stage(self, stage):
+        """Reports the stage the current pull has reached.
+
+        :param stage: A short description of the stage
+        :type stage: str
+        """
+        if not self._on_stage:
+            return
+        try:
+            self._on_stage(stage)
+        except Exception as e:
+            print(str(e))
+
     def _hein_search(self, page, search_term):
         """Searches Hein for a search_term.
 
@@ -346,6 +435,7 @@ class Puller(object):
         :param search_term: The search_term to search for
         :type search_term: str
         """
+        self._stage("Searching Hein")
         page.goto(self.HEIN_SEARCH_URL.format(quote(search_term, safe="")))
         page.wait_for_selector("#page_content")
         if (
@@ -355,12 +445,48 @@ class Puller(object):
         ):
             raise NotFoundError
 
+    def _westlaw_find(self, page, citation):
+        """Opens a Westlaw document straight from its citation.
+
+        Westlaw's find-by-citation link goes directly to the cited
+        document, without loading a search page and submitting its form
+        first. If the citation is ambiguous or unknown, Westlaw shows a
+        list of results or an error page instead.
+        :param page: The page to use for the lookup
+        :type page: Page
+        :param citation: The citation to find
+        :type citation: str
+        :returns: Whether the document was opened
+        :rtype: {bool}
+        """
+        from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+
+        self._stage("Finding on Westlaw")
+        page.goto(self.WESTLAW_FIND_URL.format(quote(citation, safe="")))
+        # Stop at whichever page the lookup lands on
+        try:
+            page.wait_for_selector(
+                ", ".join(
+                    (
+                        self.WESTLAW_DOCUMENT,
+                        self.WESTLAW_RESULT_LIST,
+                        self.WESTLAW_NO_RESULTS,
+                    )
+                ),
+                timeout=self.timeout(10),
+            )
+        except PlaywrightTimeoutError:
+            return False
+        return page.query_selector(self.WESTLAW_DOCUMENT) is not None
+
     def _westlaw_search(self, page, url, search_term):
         """Searches Westlaw for a search_term.
 
         A search for Westlaw that is general across source types
         by allowing you to specify a particular search url (e.g.,
-        the appropriate search page for Cases or for Statutes)
+        the appropriate search page for Cases or for Statutes).
+        The search term is first looked up as a citation, and the
+        search page is only used if that doesn't open a document.
         :param page: The page to use for search
         :type page: Page
         :param url: The url to input the search term
@@ -368,36 +494,50 @@ class Puller(object):
         :param search_term: The search_term to search for
         :type search_term: str
         """
+        if self._westlaw_find(page, search_term):
+            return
+        self._stage("Searching Westlaw")
         page.goto(url)
         page.wait_for_selector("#searchInputId", timeout=self.timeout(20))
         page.fill("#searchInputId", search_term)
         page.click("#searchButton")
         for i in range(20):
             page.wait_for_timeout(self.timeout(1))
-            if page.query_selector("#co_docHeader #title"):
+            if page.query_selector(self.WESTLAW_DOCUMENT):
                 return
         raise NotFoundError
 
-    def _hein_download(self, a_tag, project, source, filename):
+    def _postprocess(self, fn, *args):
+        """Hands a post-processing job off to the pipeline.
+
+        :param fn: The pipeline job function to run
+        :type fn: function
+        :returns: The future of the job
+        :rtype: {Future}
+        """
+        self._stage("Post-processing")
+        self.postprocessing = self.pipeline.submit(fn, *args)
+        return self.postprocessing
+
+    def _hein_download(self, a_tag):
         """Downloads a Hein source.
 
         Hein's download functionality is a bit strange with Playwright.
         It doesn't operate like the page.expect_download() normally
         does, so this function takes the href attribute on the download
         button and opens it in a new page, which triggers a download
-        properly.
-        :param project: The project it belongs to
-        :type project: Project
+        properly. The download is read into memory with its cover page
+        intact, so it still needs to go through the pipeline before it
+        is written to the pull folder.
         :param a_tag: The <a> tag of the file to download
         :type a_tag: ElementHandle
-        :param source: The source we are downloading
-        :type source: Source
-        :param filename: The filename to save the result as
-        :type filename: str
-        :returns: The filepath of the download
-        :rtype: {str}
+        :returns: The contents of the download
+        :rtype: {bytes}
         """
-        new_page = self.firefox.new_page()
+        from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+
+        self._stage("Downloading from Hein")
+        new_page = self._get_page("Hein downloads")
         try:
             a_href = a_tag.get_attribute("href")
             try:
@@ -416,16 +556,15 @@ class Puller(object):
                     ) as download_info:
                         new_page.click(btn_selector, timeout=self.timeout(10))
             download = download_info.value
-            save_filepath = project.save_pull_path(filename, "pdf")
-            download.save_as(save_filepath)
-            utils.remove_first_page(save_filepath)
+            with open(download.path(), "rb") as f:
+                data = f.read()
+            download.delete()
         except Exception as e:
             print(str(e))
+            self._reset_page("Hein downloads")
             return None
         else:
-            return save_filepath
-        finally:
-            new_page.close()
+            return data
 
     def _westlaw_download(self, page, project, source, filename):
         """Downloads a Westlaw source.
@@ -445,6 +584,7 @@ class Puller(object):
         :returns: The downloaded filepath
         :rtype: {str}
         """
+        self._stage("Downloading from Westlaw")
         save_filepath = project.save_pull_path(filename, "pdf")
         # Check to see if the source has an Original Image...
         original_img_link = page.query_selector('a:has-text("Original Image")')
@@ -458,7 +598,8 @@ class Puller(object):
             with page.expect_download(timeout=self.timeout(20)) as download_info:
                 a_tag.click()
             download = download_info.value
-            download.save_as(save_filepath)
+            with utils.atomic_write(save_filepath) as temp_path:
+                download.save_as(temp_path)
             return save_filepath
         # ...if it does not, and it is a state statute or Westlaw
         # Reporter (WL), use the download button
@@ -475,13 +616,14 @@ class Puller(object):
             with page.expect_download(timeout=self.timeout(20)) as download_info:
                 page.click("#coid_deliveryWaitMessage_downloadButton")
             download = download_info.value
-            download.save_as(save_filepath)
+            with utils.atomic_write(save_filepath) as temp_path:
+                download.save_as(temp_path)
             return save_filepath
         # ...otherwise ignore it
         else:
             raise NoAttemptError
 
-    def pull(self, source, project):
+    def pull(self, source, project, on_stage=None):
         """Pulls a source.
 
         Runs the playwright browser to attempt to find the source.
@@ -491,9 +633,26 @@ class Puller(object):
         :type source: Source
         :param source: The project that the source belows to
         :type source: Project
+        :param on_stage: Called with a description of each stage the
+            pull reaches, defaults to None
+        :type on_stage: function, optional
         :returns: The result of the pull
         :rtype: {Result}
         """
+        self.postprocessing = None
+        self._on_stage = on_stage
+        start = time.monotonic()
+        try:
+            result = self._pull(source, project)
+        finally:
+            self._on_stage = None
+        # Failed pulls end early or at a timeout, and would skew how
+        # long a pull is expected to take
+        if result == Result.SUCCESS:
+            self.timings.record(source.kind, time.monotonic() - start)
+        return result
+
+    def _pull(self, source, project):
         result = Result.NO_ATTEMPT
 
         # ==============================================================
@@ -510,20 +669,27 @@ class Puller(object):
         # Websites should get downloaded directly from their URL.
         # ==============================================================
         if source.kind == Kind.WEBSITE:
-            page = self.chrome.new_page()
+            page = self._get_page("Website")
             try:
+                self._stage("Loading website")
                 page.goto(source.short_cite, wait_until="load")
                 # Check if the browser's PDF viewer is open and download
                 # the file directly if so
                 if page.query_selector('embed[type="application/pdf"]'):
+                    self._stage("Downloading PDF")
                     pdf_path = project.save_pull_path(source.filename, "pdf")
-                    urlretrieve(source.short_cite, pdf_path)
+                    with utils.atomic_write(pdf_path) as temp_path:
+                        urlretrieve(source.short_cite, temp_path)
                 # Otherwise, take a full page screenshot of the page
                 else:
-                    img_path = project.save_pull_path(source.filename, "png")
+                    self._stage("Taking screenshot")
+                    img_path = project.save_staging_path(source.filename, "png")
                     page.screenshot(full_page=True, path=img_path)
-                    utils.img2pdf(img_path)
-                    os.remove(img_path)
+                    self._postprocess(
+                        pipeline.convert_screenshot,
+                        img_path,
+                        project.save_pull_path(source.filename, "pdf"),
+                    )
             except NotFoundError:
                 result = Result.NOT_FOUND
             except NoAttemptError:
@@ -531,10 +697,9 @@ class Puller(object):
             except Exception as e:
                 print(str(e))
                 result = Result.FAILURE
+                self._reset_page("Website")
             else:
                 result = Result.SUCCESS
-            finally:
-                page.close()
 
         # ==============================================================
         # SSRN
@@ -543,15 +708,16 @@ class Puller(object):
         # the Download This Paper button on the paper.
         # ==============================================================
         if source.kind == Kind.SSRN:
-            page = self.firefox.new_page()
+            page = self._get_page("SSRN")
             try:
+                self._stage("Downloading from SSRN")
                 page.goto(source.short_cite)
                 with page.expect_download(timeout=self.timeout(10)) as download_info:
                     page.click("text=Download This Paper")
                 download = download_info.value
                 download_path = project.save_pull_path(source.filename, "pdf")
-                download.save_as(download_path)
-                download.path()
+                with utils.atomic_write(download_path) as temp_path:
+                    download.save_as(temp_path)
             except NotFoundError:
                 result = Result.NOT_FOUND
             except NoAttemptError:
@@ -559,10 +725,9 @@ class Puller(object):
             except Exception as e:
                 print(str(e))
                 result = Result.FAILURE
+                self._reset_page("SSRN")
             else:
                 result = Result.SUCCESS
-            finally:
-                page.close()
 
         # ==============================================================
         # JOURNAL
@@ -584,16 +749,16 @@ class Puller(object):
         # 3. Maybe other ways I haven't seen, but those won't be handled
         # ==============================================================
         if source.kind == Kind.JOURNAL:
-            page = self.firefox.new_page()
+            page = self._get_page("Hein")
             try:
                 self._hein_search(page, source.short_cite)
                 # Create variables that will eventually keep track of
                 # the download paths, as well as the issue's Table of
                 # Contents format and where it was found
                 toc_method = ""  # one of: (top|under|global|'')
-                article_path = ""
-                toc1_path = ""
-                toc2_path = ""
+                article_pdf = None
+                toc1_pdf = None
+                toc2_pdf = None
                 toc1_li = None
                 toc2_li = None
                 # ------------------------------------------------------
@@ -629,13 +794,8 @@ class Puller(object):
                 # ------------------------------------------------------
                 article_li = page.query_selector(".atocpage.sectionhighlight")
                 article_print_a = article_li.query_selector("a.contents_print")
-                article_path = self._hein_download(
-                    article_print_a,
-                    project,
-                    source,
-                    "{}-article".format(source.filename),
-                )
-                if not article_path:
+                article_pdf = self._hein_download(article_print_a)
+                if not article_pdf:
                     raise Exception("Error while downloading journal article")
                 # ------------------------------------------------------
                 # Get the first Table of Contents
@@ -664,9 +824,7 @@ class Puller(object):
                     if toc1_li:
                         toc_method = "global"
                 toc1_print_a = toc1_li.query_selector("a.contents_print")
-                toc1_path = self._hein_download(
-                    toc1_print_a, project, source, "{}-toc1".format(source.filename)
-                )
+                toc1_pdf = self._hein_download(toc1_print_a)
                 # ------------------------------------------------------
                 # Get the second Table of Contents (if needed)
                 # ------------------------------------------------------
@@ -695,22 +853,22 @@ class Puller(object):
                     elif toc_method == "global":
                         pass  # do nothing because there was only one TOC
                     toc2_print_a = toc2_li.query_selector("a.contents_print")
-                    toc2_path = self._hein_download(
-                        toc2_print_a, project, source, "{}-toc2".format(source.filename)
-                    )
+                    toc2_pdf = self._hein_download(toc2_print_a)
                 # ------------------------------------------------------
-                # Merge and save the PDFs
+                # Merge and save the PDFs (in the pipeline)
                 # ------------------------------------------------------
                 pdfs = []
-                if toc1_path:
-                    pdfs.append(toc1_path)
-                if toc2_path:
-                    pdfs.append(toc2_path)
-                if article_path:
-                    pdfs.append(article_path)
-                utils.merge(pdfs, project.save_pull_path(source.filename, "pdf"))
-                for pdf in pdfs:
-                    os.remove(pdf)
+                if toc1_pdf:
+                    pdfs.append(toc1_pdf)
+                if toc2_pdf:
+                    pdfs.append(toc2_pdf)
+                if article_pdf:
+                    pdfs.append(article_pdf)
+                self._postprocess(
+                    pipeline.merge_hein_parts,
+                    pdfs,
+                    project.save_pull_path(source.filename, "pdf"),
+                )
             except NotFoundError:
                 result = Result.NOT_FOUND
             except NoAttemptError:
@@ -718,10 +876,9 @@ class Puller(object):
             except Exception as e:
                 print(str(e))
                 result = Result.FAILURE
+                self._reset_page("Hein")
             else:
                 result = Result.SUCCESS
-            finally:
-                page.close()
 
         # ==============================================================
         # STATE
@@ -731,7 +888,7 @@ class Puller(object):
         # handles that for us.
         # ==============================================================
         if source.kind == Kind.STATE:
-            page = self.firefox.new_page()
+            page = self._get_page("Westlaw")
             try:
                 self._westlaw_search(page, self.WESTLAW_STATUTES_URL, source.short_cite)
                 download_path = self._westlaw_download(
@@ -746,10 +903,9 @@ class Puller(object):
             except Exception as e:
                 print(str(e))
                 result = Result.FAILURE
+                self._reset_page("Westlaw")
             else:
                 result = Result.SUCCESS
-            finally:
-                page.close()
 
         # ==============================================================
         # FEDERAL
@@ -758,7 +914,7 @@ class Puller(object):
         # 2018 U.S. Code edition.
         # ==============================================================
         if source.kind == Kind.FEDERAL:
-            page = self.firefox.new_page()
+            page = self._get_page("Hein")
             try:
                 self._hein_search(page, source.short_cite)
                 try:
@@ -792,11 +948,14 @@ class Puller(object):
                 section_print_a = page.query_selector(
                     ".atocpage.sectionhighlight a.contents_print"
                 )
-                download_path = self._hein_download(
-                    section_print_a, project, source, source.filename
+                download_pdf = self._hein_download(section_print_a)
+                if not download_pdf:
+                    raise Exception("No download returned")
+                self._postprocess(
+                    pipeline.strip_cover_page,
+                    download_pdf,
+                    project.save_pull_path(source.filename, "pdf"),
                 )
-                if not download_path:
-                    raise Exception("No download path returned")
             except NotFoundError:
                 result = Result.NOT_FOUND
             except NoAttemptError:
@@ -804,10 +963,9 @@ class Puller(object):
             except Exception as e:
                 print(str(e))
                 result = Result.FAILURE
+                self._reset_page("Hein")
             else:
                 result = Result.SUCCESS
-            finally:
-                page.close()
 
         # ==============================================================
         # SCOTUS
@@ -820,7 +978,7 @@ class Puller(object):
         short_cite_no_space = source.short_cite.replace(" ", "").lower()
         in_other_reporters = "s.ct" in short_cite_no_space
         if source.kind == Kind.SCOTUS and not in_other_reporters:
-            page = self.firefox.new_page()
+            page = self._get_page("Hein")
             try:
                 self._hein_search(page, source.short_cite)
                 try:
@@ -836,11 +994,14 @@ class Puller(object):
                 section_print_a = page.query_selector(
                     ".atocpage.sectionhighlight a.contents_print"
                 )
-                download_path = self._hein_download(
-                    section_print_a, project, source, source.filename
+                download_pdf = self._hein_download(section_print_a)
+                if not download_pdf:
+                    raise Exception("No download returned")
+                self._postprocess(
+                    pipeline.strip_cover_page,
+                    download_pdf,
+                    project.save_pull_path(source.filename, "pdf"),
                 )
-                if not download_path:
-                    raise Exception("No download path returned")
             except NotFoundError:
                 result = Result.NOT_FOUND
             except NoAttemptError:
@@ -848,17 +1009,16 @@ class Puller(object):
             except Exception as e:
                 print(str(e))
                 result = Result.FAILURE
+                self._reset_page("Hein")
             else:
                 result = Result.SUCCESS
-            finally:
-                page.close()
 
         # SCOTUS but found in different reporters, e.g.,
         # "76 S. Ct. 212"; fallback to Westlaw for these or any errors
         if source.kind == Kind.SCOTUS and (
             in_other_reporters or result != Result.SUCCESS
         ):
-            page = self.firefox.new_page()
+            page = self._get_page("Westlaw")
             try:
                 self._westlaw_search(page, self.WESTLAW_CASES_URL, source.short_cite)
                 download_path = self._westlaw_download(
@@ -873,10 +1033,9 @@ class Puller(object):
             except Exception as e:
                 print(str(e))
                 result = Result.FAILURE
+                self._reset_page("Westlaw")
             else:
                 result = Result.SUCCESS
-            finally:
-                page.close()
 
         # ==============================================================
         # NON_SCOTUS
@@ -886,7 +1045,7 @@ class Puller(object):
         # that for us.
         # ==============================================================
         if source.kind == Kind.NON_SCOTUS:
-            page = self.firefox.new_page()
+            page = self._get_page("Westlaw")
             try:
                 self._westlaw_search(page, self.WESTLAW_CASES_URL, source.short_cite)
                 download_path = self._westlaw_download(
@@ -901,10 +1060,19 @@ class Puller(object):
             except Exception as e:
                 print(str(e))
                 result = Result.FAILURE
+                self._reset_page("Westlaw")
             else:
                 result = Result.SUCCESS
-            finally:
-                page.close()
+
+        # Sources that were saved directly still get optimized
+        if (
+            result == Result.SUCCESS
+            and self.pipeline.optimize
+            and not self.postprocessing
+        ):
+            self._postprocess(
+                pipeline.written, project.save_pull_path(source.filename, "pdf")
+            )
 
         return result
 
@@ -0,0 +1,180 @@
+import os
+import sqlite3
+from contextlib import closing
+
+from coyote_badger.config import (
+    PULL_RATE_LIMITS,
+    PULL_TIMINGS_FILE,
+    PULL_TIMINGS_WEIGHT,
+)
+from coyote_badger.source import Kind
+
+# The service each Kind is pulled from first. Kinds that are never
+# pulled (e.g. books) have none.
+BACKENDS = {
+    Kind.WEBSITE: "Website",
+    Kind.SSRN: "SSRN",
+    Kind.JOURNAL: "Hein",
+    Kind.FEDERAL: "Hein",
+    Kind.SCOTUS: "Hein",
+    Kind.STATE: "Westlaw",
+    Kind.NON_SCOTUS: "Westlaw",
+}
+# The expected seconds of a pull of each Kind, until some are recorded
+DEFAULT_SECONDS = {
+    Kind.BOOK: 0,
+    Kind.UNKNOWN: 0,
+    Kind.WEBSITE: 10,
+    Kind.SSRN: 15,
+    Kind.JOURNAL: 60,
+    Kind.FEDERAL: 30,
+    Kind.SCOTUS: 30,
+    Kind.STATE: 25,
+    Kind.NON_SCOTUS: 25,
+}
+
+CREATE_TABLES = """
+    CREATE TABLE IF NOT EXISTS timings (
+        kind TEXT PRIMARY KEY,
+        pulls INTEGER,
+        seconds REAL  -- moving average of the pulls
+    );
+"""
+RECORD_TIMING = """
+    INSERT INTO timings (kind, pulls, seconds) VALUES (?, 1, ?)
+    ON CONFLICT (kind) DO UPDATE SET
+        pulls = pulls + 1,
+        seconds = seconds + (excluded.seconds - seconds) * ?
+"""
+
+
+class PullTimings(object):
+    def __init__(self, path=PULL_TIMINGS_FILE, weight=PULL_TIMINGS_WEIGHT):
+        """Creates a new PullTimings.
+
+        A persisted record of how long pulls of each Kind take, kept
+        as a moving average so it follows changes in the services.
+        Every call opens its own connection, so it can be used from
+        any thread.
+        :param path: The path of the database
+        :type path: str
+        :param weight: How much a new pull moves the average, between
+            0 and 1
+        :type weight: float
+        """
+        self.path = path
+        self.weight = weight
+
+    def _connect(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        db = sqlite3.connect(self.path)
+        db.executescript(CREATE_TABLES)
+        return db
+
+    def record(self, kind, seconds):
+        """Records how long a pull took.
+
+        :param kind: The kind of the source that was pulled
+        :type kind: Kind
+        :param seconds: How long the pull took
+        :type seconds: float
+        """
+        try:
+            with closing(self._connect()) as db, db:
+                db.execute(RECORD_TIMING, (kind.value, seconds, self.weight))
+        except sqlite3.Error as e:
+            print(str(e))
+
+    def get_expected(self):
+        """Gets the expected seconds of a pull of each Kind.
+
+        :returns: Mapping of Kind to seconds
+        :rtype: {dict(Kind -> float)}
+        """
+        expected = dict(DEFAULT_SECONDS)
+        try:
+            with closing(self._connect()) as db:
+                rows = db.execute("SELECT kind, seconds FROM timings").fetchall()
+        except sqlite3.Error as e:
+            print(str(e))
+            return expected
+        for kind, seconds in rows:
+            try:
+                expected[Kind(kind)] = seconds
+            except ValueError:
+                pass
+        return expected
+
+
+def get_backend(source):
+    """Gets the service a source is pulled from first.
+
+    Like Puller.pull(), SCOTUS cases cited to the Supreme Court Reporter
+    (e.g. "76 S. Ct. 212") go straight to Westlaw, since Hein doesn't
+    have them. Other SCOTUS cases only fall back to Westlaw if Hein
+    fails, which can't be known ahead of time.
+    :param source: The source
+    :type source: Source
+    :returns: The name of the backend, or None if it is never pulled
+    :rtype: {str}
+    """
+    if source.kind == Kind.SCOTUS:
+        short_cite_no_space = source.short_cite.replace(" ", "").lower()
+        if "s.ct" in short_cite_no_space:
+            return "Westlaw"
+    return BACKENDS.get(source.kind)
+
+
+def schedule(sources, expected, rate_limits=PULL_RATE_LIMITS):
+    """Orders a batch of pulls.
+
+    Pulls run one at a time, so doing the quick ones first gets most
+    results sooner, and spacing out the pulls from a rate-limited
+    backend (Hein) keeps it from slowing the whole batch down.
+
+    The batch is played out with each pull's expected duration. Pulls
+    that need no service (e.g. books) go first. Then, whenever a
+    rate-limited backend has rested long enough since its last pull,
+    its next pull goes next, so the backend is kept as busy as it
+    allows. While it rests, the shortest pull from any other backend
+    runs in between. Each backend's pulls are taken shortest first,
+    then in row order.
+    :param sources: The sources to pull, with their rows
+    :type sources: [(int, Source)]
+    :param expected: Mapping of Kind to the expected seconds of a pull
+    :type expected: dict(Kind -> float)
+    :param rate_limits: Mapping of backend to the seconds it should rest
+        between two of its pulls, defaults to PULL_RATE_LIMITS
+    :type rate_limits: dict(str -> float), optional
+    :returns: The rows, in the order to pull them
+    :rtype: {[int]}
+    """
+    queues = {}
+    for index, source in sources:
+        queue = queues.setdefault(get_backend(source), [])
+        queue.append((expected.get(source.kind, 0), index))
+    # Longest first, so the shortest can be popped off the end
+    for queue in queues.values():
+        queue.sort(reverse=True)
+
+    order = [index for _, index in reversed(queues.pop(None, []))]
+    now = 0
+    ready_at = dict.fromkeys(queues, 0)
+    while queues:
+        limited = [b for b in queues if b in rate_limits and ready_at[b] <= now]
+        others = [b for b in queues if b not in rate_limits]
+        if limited:
+            backend = min(limited, key=lambda b: queues[b][-1])
+        elif others:
+            backend = min(others, key=lambda b: queues[b][-1])
+        else:
+            # Only rate-limited backends are left, and all must wait
+            backend = min(queues, key=lambda b: ready_at[b])
+            now = ready_at[backend]
+        seconds, index = queues[backend].pop()
+        order.append(index)
+        now += seconds
+        ready_at[backend] = now + rate_limits.get(backend, 0)
+        if not queues[backend]:
+            del queues[backend]
+    return order
@@ -1,11 +1,13 @@
 import re
 from enum import Enum
+from functools import lru_cache
 
-from urlextract import URLExtract
+from coyote_badger.utils import clean_filename, find_url
 
-from coyote_badger.utils import clean_filename
-
-extractor = URLExtract()
+# The number of distinct citation strings (and filenames) whose derived
+# fields are memoized. Rows of a project share most of their strings
+# with every other time the project was loaded.
+CITATION_CACHE_SIZE = 16384
 
 
 class Header(Enum):
@@ -41,6 +43,17 @@ class Result(Enum):
 
 
 class Source(object):
+    __slots__ = (
+        "fn_num",
+        "long_cite",
+        "short_cite",
+        "library",
+        "has_book",
+        "_filename",
+        "_kind",
+        "_result",
+    )
+
     def __init__(
         self,
         fn_num=None,
@@ -52,20 +65,35 @@ class Source(object):
         kind=None,
         result=None,
     ):
+        """Creates a new Source.
+
+        Fields derived from the citation (the inferred kind, whether it
+        is from the Westlaw Reporter and the cleaned filename) are only
+        computed when they are first read, and are memoized per string,
+        so loading a project whose rows already have a kind is cheap.
+        """
         # Public properties that are used in the Source sheet
         self.fn_num = fn_num
         self.long_cite = long_cite or ""
         self.short_cite = short_cite or ""
-        self.filename = clean_filename(filename or "")
+        self.filename = filename
         self.library = library or ""
         self.has_book = has_book or ""
         self.kind = kind
         self.result = result
-        # Hidden properties that are not shown in the Source sheet
-        self._is_westlaw_reporter = self.infer_westlaw_reporter()
+
+    @property
+    def filename(self):
+        return _clean_filename(self._filename)
+
+    @filename.setter
+    def filename(self, value):
+        self._filename = value or ""
 
     @property
     def kind(self):
+        if self._kind is None:
+            self._kind = self.infer_kind()
         return self._kind
 
     @kind.setter
@@ -76,7 +104,12 @@ class Source(object):
             try:
                 self._kind = Kind(value)
             except ValueError:
-                self._kind = self.infer_kind()
+                # Inferred on first access
+                self._kind = None
+
+    @property
+    def _is_westlaw_reporter(self):
+        return self.infer_westlaw_reporter()
 
     @property
     def result(self):
@@ -101,80 +134,10 @@ class Source(object):
         :returns: The kind of the source
         :rtype: {Kind}
         """
-        long_cite_lower = self.long_cite.lower()
-        long_cite_no_periods = self.long_cite.replace(".", "")
-
         # If we already have it marked as a book, use that.
         if self.has_book or self.library:
             return Kind.BOOK
-
-        # If it contains a URL, mark it as a website. Even if it's
-        # something else, the puller will be able to download the
-        # source at the URL if it thinks it is a website.
-        if extractor.has_urls(self.long_cite):
-            url = extractor.find_urls(self.long_cite)[0]
-            if "ssrn.com" in url:
-                return Kind.SSRN
-            else:
-                return Kind.WEBSITE
-
-        # If somewhere in the citation we find "## U.S. ##",
-        # "## U.S. at ##" or "## S.Ct. ##" (along with minor variations
-        # of those forms), it is most likely a SCOTUS case.
-        if (
-            re.search("[0-9]+ [sS] ?[cC][tT] [0-9]+", long_cite_no_periods)
-            or re.search("[0-9]+ U ?S [0-9]+", long_cite_no_periods)
-            or re.search("[0-9]+ U ?S at [0-9]+", long_cite_no_periods)
-        ):
-            return Kind.SCOTUS
-
-        # If somewhere in the citation we find " v. " or "In re" and it
-        # wasn't a SCOTUS case, it is most likely a non-SCOTUS case.
-        if " v. " in long_cite_lower or "in re " in long_cite_lower:
-            return Kind.NON_SCOTUS
-
-        # If somewhere in the citation we find a "## USC ##" format
-        # (along with minor variations of that form), it is most likely
-        # a federal statute.
-        if " u.s.c. " in long_cite_lower or " u.s. code " in long_cite_lower:
-            return Kind.FEDERAL
-        if re.search("[0-9]+ (.{4,8}) [0-9]+", long_cite_no_periods):
-            match = re.search("[0-9]+ (.{4,8}) [0-9]+", long_cite_no_periods)
-            if "usc" in match.group(1).lower():
-                return Kind.FEDERAL
-
-        # If somewhere in the citation we find a "Stat." or a "§", it
-        # is most likely a state statute since we didn't already pick
-        # up on the federal statute above.
-        if " stat. " in long_cite_lower or "§" in self.long_cite:
-            return Kind.STATE
-
-        # If somewhere in the citation we find a "## text ##" format
-        # where the text between the numbers is at least 7 characters,
-        # the citation also has some commas, and it ends with a year,
-        # it is most likely a journal.
-        if (
-            "," in self.long_cite
-            and re.search("\\([0-9]{4}\\)", self.long_cite)
-            and re.search("[0-9]+ .{7,}? [0-9]+", self.long_cite)
-        ):
-            return Kind.JOURNAL
-
-        # Similar to the test for journals, if it has commas and ends
-        # in a year but DOESN'T have the "## text ##" format, it might
-        # be a book. Since we can't pull books anyways, let's just mark
-        # these as Unknown.
-        if (
-            "," in self.long_cite
-            and re.search("\\([0-9]{4}\\)", self.long_cite)
-            and not re.search("[0-9]+ .+? [0-9]+", self.long_cite)
-        ):
-            # return Kind.BOOK
-            return Kind.UNKNOWN
-
-        # For everything else, return Unknown so that the puller
-        # does not waste its time.
-        return Kind.UNKNOWN
+        return infer_citation_kind(self.long_cite)
 
     def infer_westlaw_reporter(self):
         """Predicts whether or not the source is from the
@@ -185,9 +148,7 @@ class Source(object):
         :returns: Whether or not it is from WL reporter
         :rtype: {boolean}
         """
-        short_cite_no_periods = self.short_cite.replace(".", "")
-        if re.search("[0-9]{4} WL [0-9]+", short_cite_no_periods):
-            return True
+        return is_westlaw_reporter(self.short_cite)
 
     @staticmethod
     def from_json(data):
@@ -224,3 +185,151 @@ class Source(object):
         data[Header.kind.name] = self.kind.value
         data[Header.result.name] = self.result.value
         return data
+
+
+def _rule(part, pattern, name=None):
+    """Builds a lookahead for one rule of the combined citation pattern.
+
+    :param part: The prefix that selects the part of the text to search
+    :type part: str
+    :param pattern: The pattern of the rule
+    :type pattern: str
+    :param name: The group that is set when the rule matches
+    :type name: str, optional
+    :returns: The pattern of the lookahead
+    :rtype: {str}
+    """
+    group = "(?P<{}>)".format(name) if name else ""
+    return "(?={}(?:{})){}".format(part, pattern, group)
+
+
+# The citation is matched as "<no periods>\0<citation>", and each rule
+# only looks at one of those parts. Lowercase checks are made with ASCII
+# case folding, which is the same as searching citation.lower() for the
+# plain ASCII phrases involved.
+_NO_PERIODS = "[^\0]*?"
+_CITATION = "[^\0]*\0[^\0]*?"
+
+# The rules are tried in order and the first one to match wins. The
+# last alternative always matches: it captures the first "## text ##"
+# (the USC check is done on it in Python) and then tries the rest.
+_RULES = re.compile(
+    "|".join(
+        [
+            _rule(
+                _NO_PERIODS,
+                "[0-9]+ (?:[sS] ?[cC][tT]|U ?S|U ?S at) [0-9]+",
+                "scotus",
+            ),
+            _rule(_CITATION, "(?i: v\\. |in re )", "case"),
+            _rule(_CITATION, "(?i: u\\.s\\.c\\. | u\\.s\\. code )", "code"),
+            "(?:{}|)(?:{}|{}|)".format(
+                _rule(_NO_PERIODS, "[0-9]+ (?P<usc_title>[^\0\n]{4,8}) [0-9]+"),
+                _rule(_CITATION, "(?i: stat\\. )|§", "state"),
+                _rule(_CITATION, ",")
+                + _rule(_CITATION, "\\([0-9]{4}\\)")
+                + _rule(_CITATION, "[0-9]+ .{7,}? [0-9]+", "journal"),
+            ),
+        ]
+    ),
+    re.ASCII,
+)
+
+
+@lru_cache(maxsize=CITATION_CACHE_SIZE)
+def infer_citation_kind(long_cite):
+    """Predicts the type of a source that is not a book from its citation.
+
+    All of the rules are evaluated in a single match of one combined
+    pattern. The result only depends on the citation, so it is
+    memoized.
+    :param long_cite: The long cite of the source
+    :type long_cite: str
+    :returns: The kind of the source
+    :rtype: {Kind}
+    """
+    # If it contains a URL, mark it as a website. Even if it's
+    # something else, the puller will be able to download the
+    # source at the URL if it thinks it is a website.
+    url = find_url(long_cite)
+    if url:
+        if "ssrn.com" in url:
+            return Kind.SSRN
+        else:
+            return Kind.WEBSITE
+
+    # The separator can't be part of the citation, and no rule treats
+    # it differently from any other control character.
+    citation = long_cite.replace("\0", "\1")
+    match = _RULES.match(citation.replace(".", "") + "\0" + citation)
+
+    # If somewhere in the citation we find "## U.S. ##",
+    # "## U.S. at ##" or "## S.Ct. ##" (along with minor variations
+    # of those forms), it is most likely a SCOTUS case.
+    if match.group("scotus") is not None:
+        return Kind.SCOTUS
+
+    # If somewhere in the citation we find " v. " or "In re" and it
+    # wasn't a SCOTUS case, it is most likely a non-SCOTUS case.
+    if match.group("case") is not None:
+        return Kind.NON_SCOTUS
+
+    # If somewhere in the citation we find a "## USC ##" format
+    # (along with minor variations of that form), it is most likely
+    # a federal statute.
+    if match.group("code") is not None:
+        return Kind.FEDERAL
+    usc_title = match.group("usc_title")
+    if usc_title is not None and "usc" in usc_title.lower():
+        return Kind.FEDERAL
+
+    # If somewhere in the citation we find a "Stat." or a "§", it
+    # is most likely a state statute since we didn't already pick
+    # up on the federal statute above.
+    if match.group("state") is not None:
+        return Kind.STATE
+
+    # If somewhere in the citation we find a "## text ##" format
+    # where the text between the numbers is at least 7 characters,
+    # the citation also has some commas, and it ends with a year,
+    # it is most likely a journal.
+    if match.group("journal") is not None:
+        return Kind.JOURNAL
+
+    # Citations that have commas and end in a year but DON'T have the
+    # "## text ##" format might be books. Since we can't pull books
+    # anyways, those are Unknown like everything else, so that the
+    # puller does not waste its time.
+    return Kind.UNKNOWN
+
+
+def classify(citations):
+    """Predicts the types of many sources from their citations.
+
+    Each distinct citation is only classified once.
+    :param citations: The long cites of the sources
+    :type citations: [str]
+    :returns: The kind of each source, in order
+    :rtype: {[Kind]}
+    """
+    kinds = {}
+    for citation in citations:
+        if citation not in kinds:
+            kinds[citation] = infer_citation_kind(citation)
+    return [kinds[citation] for citation in citations]
+
+
+@lru_cache(maxsize=CITATION_CACHE_SIZE)
+def is_westlaw_reporter(short_cite):
+    """Predicts whether a short cite is from the Westlaw Reporter.
+
+    :param short_cite: The short cite of the source
+    :type short_cite: str
+    :returns: Whether it matches the YYYY WL XX..XXX format
+    :rtype: {bool}
+    """
+    short_cite_no_periods = short_cite.replace(".", "")
+    return bool(re.search("[0-9]{4} WL [0-9]+", short_cite_no_periods))
+
+
+_clean_filename = lru_cache(maxsize=CITATION_CACHE_SIZE)(clean_filename)
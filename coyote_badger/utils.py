@@ -1,10 +1,103 @@
+import hashlib
 import os
+import re
+import stat
+from contextlib import contextmanager
+from io import BytesIO
 from string import printable
+from tempfile import mkstemp
+from threading import Lock
+from zipfile import ZIP_DEFLATED, ZIP_STORED, ZipFile, ZipInfo
 
-from PIL import Image
-from PyPDF2 import PdfFileMerger, PdfFileReader, PdfFileWriter
 from sanitize_filename import sanitize
 
+JPEG_QUALITY = 85
+# Raster pages (e.g. screenshots, which img2pdf() sizes at one point per
+# pixel) are printed scaled to fit the width of a letter page, so that
+# is the size their resolution is measured at
+PRINT_WIDTH_INCHES = 8.5
+ZIP_CHUNK_SIZE = 1024 * 1024  # 1 MB
+# Already compressed formats that are stored in zips as-is
+STORED_EXTENSIONS = (".pdf", ".xlsx", ".png", ".jpg", ".jpeg")
+
+# A URL written out with its scheme, which is how most URLs in citations
+# appear: a host name that ends in a top-level domain made of letters,
+# an optional port and an optional path. It must start the text or
+# follow whitespace, and it runs up to whitespace or to the characters
+# URLExtract stops at. Only ASCII whitespace counts, like in URLExtract,
+# so e.g. a URL after a non-breaking space is left to it.
+HTTP_URL_RE = re.compile(
+    "(?<![^ \\t\\n\\r\\f\\v])https?://(?:[^\\W_](?:[\\w-]*[^\\W_])?\\.)+"
+    '(?P<tld>[^\\W\\d_]{2,})(?::[0-9]{1,5})?(?:/[^ \\t\\n\\r\\f\\v<>";]*)?'
+    '(?![^ \\t\\n\\r\\f\\v<>";])',
+    re.IGNORECASE,
+)
+# Where the top-level domain of a URL found by URLExtract could be. A
+# top-level domain is a dot, then either a letter and at least one more
+# character, or a number of up to three digits (the last part of an IP
+# address), and it must end the word. URLExtract also finds "localhost".
+# Text without any of these can't have a URL, e.g. "12 U.S. 45" or
+# "139 F.3d 1".
+_AFTER_TLD = "\\s/\"'<>?:.,)}\\]\\\\`"
+TLD_CANDIDATE_RE = re.compile(
+    "\\.(?:[^\\W\\d_][^{0}]|[0-9]{{1,3}}(?:[{0}]|$))|localhost".format(_AFTER_TLD),
+    re.IGNORECASE,
+)
+# The URLs that URLExtract would trim or take apart further
+UNTRIMMED_URL_RE = re.compile("[^\\w/]$|[()\\[\\]{}'`]")
+
+_url_extractor = None
+_url_extractor_lock = Lock()
+_known_tlds = None
+
+# The umask can only be read by setting it, which isn't safe once other
+# threads are creating files, so it's read once on import
+_umask = os.umask(0)
+os.umask(_umask)
+
+
+def _file_mode(path):
+    """Gets the mode a file written to a path should have.
+
+    :param path: The path of the file
+    :type path: str
+    :returns: The mode of the existing file, or 0o666 less the umask
+    :rtype: {int}
+    """
+    try:
+        return stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        return 0o666 & ~_umask
+
+
+@contextmanager
+def atomic_write(path):
+    """Writes a file atomically.
+
+    Yields a temporary path next to the destination to write to. Once
+    the block finishes, the temporary file is renamed over the
+    destination so a partially written file is never visible at
+    ``path``. If the block raises, the temporary file is removed.
+
+    The file keeps the mode of the file it replaces, or gets the usual
+    mode of a new file, since mkstemp() only gives its owner access.
+    :param path: The final path of the file
+    :type path: str
+    :yields: The temporary path to write to
+    :rtype: {str}
+    """
+    folder, name = os.path.split(path)
+    fd, temp_path = mkstemp(dir=folder, prefix=f".{name}.", suffix=".part")
+    os.close(fd)
+    try:
+        yield temp_path
+        os.chmod(temp_path, _file_mode(path))
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
 
 def img2pdf(in_path, out_path=None):
     """Converts an image to a pdf.
@@ -16,40 +109,321 @@ def img2pdf(in_path, out_path=None):
     :returns: The path to the output pdf
     :rtype: {str}
     """
+    from PIL import Image
+
     out_path = out_path or "{}.pdf".format(os.path.splitext(in_path)[0])
     img = Image.open(in_path).convert("RGB")
-    img.save(out_path)
+    with atomic_write(out_path) as temp_path:
+        img.save(temp_path, "PDF")
     return out_path
 
 
-def merge(paths, save_as_path):
-    """Merges multiple PDFs.
+def merge_without_first_pages(parts, save_as_path):
+    """Merges PDFs in memory, dropping the first page of each.
 
-    :param paths: The filepaths to merge
-    :type paths: [str]
+    Each part is parsed from memory and only the merged result is
+    written to disk, so the output is written exactly once.
+    :param parts: The contents of the PDFs to merge, in order
+    :type parts: [bytes]
     :param save_as_path: The filename to save the result as
     :type save_as_path: str
     """
-    merger = PdfFileMerger()
-    for path in paths:
-        merger.append(path)
-    merger.write(save_as_path)
-    merger.close()
+    from PyPDF2 import PdfFileReader, PdfFileWriter
+
+    output = PdfFileWriter()
+    for part in parts:
+        infile = PdfFileReader(BytesIO(part))
+        for i in range(1, infile.getNumPages()):
+            output.addPage(infile.getPage(i))
+    with atomic_write(save_as_path) as temp_path:
+        with open(temp_path, "wb") as f:
+            output.write(f)
 
 
-def remove_first_page(path):
-    """Removes the first page of a PDF.
+def optimize_pdf(path, image_dpi=None):
+    """Rewrites a PDF in place to make it smaller.
 
+    Drops objects no page refers to, points identical images on
+    different pages at one shared copy, removes images a page never
+    draws, and recompresses the page content streams. If ``image_dpi``
+    is given, pages that are a single raster image (screenshots and
+    scans) have that image re-encoded as JPEG, downsampled to at most
+    that resolution when printed to the width of a letter page.
+    The original file is kept if the result isn't any smaller.
     :param path: The filepath of the PDF
     :type path: str
+    :param image_dpi: The maximum resolution of raster pages,
+        defaults to None (raster pages are left alone)
+    :type image_dpi: int, optional
+    :returns: The size of the file before and after, in bytes
+    :rtype: {(int, int)}
     """
-    infile = PdfFileReader(path, "rb")
+    from PyPDF2 import PdfFileReader, PdfFileWriter
+
+    before = os.path.getsize(path)
+    infile = PdfFileReader(path, strict=False)
     output = PdfFileWriter()
-    for i in range(1, infile.getNumPages()):
-        p = infile.getPage(i)
-        output.addPage(p)
-    with open(path, "wb") as f:
-        output.write(f)
+    seen_images = {}
+    for i in range(infile.getNumPages()):
+        page = infile.getPage(i)
+        _optimize_page(page, seen_images, image_dpi)
+        output.addPage(page)
+    buffer = BytesIO()
+    output.write(buffer)
+    data = buffer.getvalue()
+    if len(data) >= before:
+        return before, before
+    with atomic_write(path) as temp_path:
+        with open(temp_path, "wb") as f:
+            f.write(data)
+    return before, len(data)
+
+
+def _optimize_page(page, seen_images, image_dpi):
+    """Optimizes a single page of a PDF for optimize_pdf().
+
+    :param page: The page to optimize
+    :type page: PageObject
+    :param seen_images: Map of image hashes to the first reference
+        seen, shared across all the pages of the PDF
+    :type seen_images: dict(str -> IndirectObject)
+    :param image_dpi: The maximum resolution of raster pages
+    :type image_dpi: int
+    """
+    from PyPDF2.generic import DictionaryObject, IndirectObject, NameObject
+    from PyPDF2.pdf import ContentStream
+
+    resources = page.get("/Resources")
+    resources = resources.getObject() if resources else DictionaryObject()
+    xobjects = resources.get("/XObject")
+    xobjects = xobjects.getObject() if xobjects else DictionaryObject()
+
+    # Share identical images between pages
+    for name in list(xobjects):
+        ref = xobjects.raw_get(name)
+        if not isinstance(ref, IndirectObject):
+            continue
+        xobject = ref.getObject()
+        digest = hashlib.sha1(xobject._data or b"")
+        digest.update(repr(sorted(k for k in xobject if k != "/Length")).encode())
+        key = digest.hexdigest()
+        if key in seen_images:
+            xobjects[name] = seen_images[key]
+        else:
+            seen_images[key] = ref
+
+    # Recompress the content stream, which also tells us what is drawn
+    try:
+        content = page.getContents()
+        if content is None:
+            return
+        content = ContentStream(content, page.pdf)
+        page[NameObject("/Contents")] = content.flateEncode()
+    except Exception as e:
+        print(str(e))
+        return
+    drawn = set(
+        operands[0] for operands, operator in content.operations if operator == b"Do"
+    )
+
+    # Remove images that are never drawn, but only when the resources
+    # belong to this page alone (shared ones may be used elsewhere)
+    if not isinstance(page.raw_get("/Resources"), IndirectObject) and not (
+        isinstance(resources.raw_get("/XObject"), IndirectObject)
+    ):
+        for name in list(xobjects):
+            if name not in drawn:
+                del xobjects[name]
+
+    # Recompress pages that are a single image, e.g. a screenshot, and
+    # downsample them if they're sharper than needed
+    if not image_dpi or len(drawn) != 1:
+        return
+    name = next(iter(drawn))
+    if name not in xobjects or xobjects[name].get("/Subtype") != "/Image":
+        return
+    xobject = xobjects[name]
+    page_inches = min(float(page.mediaBox.getWidth()) / 72, PRINT_WIDTH_INCHES)
+    dpi = xobject["/Width"] / page_inches if page_inches > 0 else 0
+    _recompress_image(xobject, min(1, image_dpi / dpi) if dpi else 1)
+
+
+def _recompress_image(xobject, scale):
+    """Re-encodes an image XObject in place as JPEG, downsampling it.
+
+    Images in a format we can't safely decode (masks, indexed or
+    CMYK colors, non 8-bit samples) are left alone, and so are images
+    that wouldn't get any smaller.
+    :param xobject: The image XObject
+    :type xobject: StreamObject
+    :param scale: The factor to scale each side by, at most 1
+    :type scale: float
+    """
+    from PIL import Image
+    from PyPDF2.filters import decodeStreamData
+    from PyPDF2.generic import NameObject, NumberObject
+
+    if "/SMask" in xobject or "/Mask" in xobject:
+        return
+    filters = xobject.get("/Filter", [])
+    filters = [filters] if isinstance(filters, str) else list(filters)
+    try:
+        if filters == ["/DCTDecode"]:
+            if scale >= 1:
+                return
+            img = Image.open(BytesIO(xobject._data))
+        elif "/DCTDecode" in filters or "/JPXDecode" in filters:
+            return
+        else:
+            mode = {"/DeviceRGB": "RGB", "/DeviceGray": "L"}.get(
+                xobject.get("/ColorSpace")
+            )
+            if not mode or xobject.get("/BitsPerComponent") != 8:
+                return
+            size = (xobject["/Width"], xobject["/Height"])
+            img = Image.frombytes(mode, size, decodeStreamData(xobject))
+        if img.mode not in ("RGB", "L"):
+            return
+        if scale < 1:
+            size = (max(1, int(img.width * scale)), max(1, int(img.height * scale)))
+            img = img.resize(size, Image.LANCZOS)
+        buffer = BytesIO()
+        img.save(buffer, "JPEG", quality=JPEG_QUALITY, optimize=True)
+    except Exception as e:
+        print(str(e))
+        return
+    if scale >= 1 and buffer.tell() >= len(xobject._data):
+        return
+    colorspace = "/DeviceRGB" if img.mode == "RGB" else "/DeviceGray"
+    xobject._data = buffer.getvalue()
+    xobject[NameObject("/Filter")] = NameObject("/DCTDecode")
+    xobject[NameObject("/ColorSpace")] = NameObject(colorspace)
+    xobject[NameObject("/BitsPerComponent")] = NumberObject(8)
+    xobject[NameObject("/Width")] = NumberObject(img.width)
+    xobject[NameObject("/Height")] = NumberObject(img.height)
+    for key in ("/DecodeParms", "/Decode"):
+        if key in xobject:
+            del xobject[key]
+    xobject.decodedSelf = None
+
+
+class _ZipStream(object):
+    """A write-only file object that collects what ZipFile writes.
+
+    It has no seek(), so ZipFile writes entries with data descriptors
+    instead of going back to patch the headers, which means each
+    chunk can be sent as soon as it's written.
+    """
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def pop(self):
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def stream_zip(files):
+    """Streams a zip archive of files as it's generated.
+
+    The archive is never built on disk or held in memory all at once;
+    each file is read and yielded in chunks. Already compressed files
+    (PDFs, workbooks, images) are stored without recompression.
+    :param files: The (path, name in archive) pairs to include
+    :type files: [(str, str)]
+    :yields: The next chunk of the archive
+    :rtype: {bytes}
+    """
+    stream = _ZipStream()
+    with ZipFile(stream, "w") as zf:
+        for path, arcname in files:
+            info = ZipInfo.from_file(path, arcname)
+            if path.lower().endswith(STORED_EXTENSIONS):
+                info.compress_type = ZIP_STORED
+            else:
+                info.compress_type = ZIP_DEFLATED
+            with open(path, "rb") as f, zf.open(info, "w", force_zip64=True) as dest:
+                while True:
+                    chunk = f.read(ZIP_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    dest.write(chunk)
+                    yield stream.pop()
+            yield stream.pop()
+    yield stream.pop()
+
+
+def get_url_extractor():
+    """Gets the URLExtract instance shared by the whole app.
+
+    It is only created the first time it's needed, since loading and
+    compiling its list of top-level domains is slow.
+    :returns: The URL extractor
+    :rtype: {URLExtract}
+    """
+    global _url_extractor
+    with _url_extractor_lock:
+        if not _url_extractor:
+            from urlextract import URLExtract
+
+            _url_extractor = URLExtract()
+    return _url_extractor
+
+
+def get_known_tlds():
+    """Gets the top-level domains that URLExtract knows.
+
+    :returns: The top-level domains, each with its leading dot
+    :rtype: {set(str)}
+    """
+    global _known_tlds
+    extractor = get_url_extractor()
+    with _url_extractor_lock:
+        if _known_tlds is None:
+            # URLExtract (pinned in requirements.txt) has no public way
+            # to get its list
+            _known_tlds = extractor._load_cached_tlds()
+    return _known_tlds
+
+
+def find_url(text):
+    """Finds the first URL in a text.
+
+    URLs that start with http:// or https:// are found with a simple
+    pattern, as long as nothing before them could be a URL too, their
+    top-level domain is one URLExtract knows, and URLExtract wouldn't
+    change them. Text that can't have a URL is skipped. Anything else
+    goes through the full URLExtract.
+    :param text: The text
+    :type text: str
+    :returns: The first URL, or None if there isn't one
+    :rtype: {str}
+    """
+    match = HTTP_URL_RE.search(text)
+    if (
+        match
+        and not TLD_CANDIDATE_RE.search(text, 0, match.start())
+        and not UNTRIMMED_URL_RE.search(match.group())
+        and "." + match.group("tld").lower() in get_known_tlds()
+    ):
+        return match.group()
+    if not TLD_CANDIDATE_RE.search(text):
+        return None
+    urls = get_url_extractor().find_urls(text)
+    return urls[0] if urls else None
 
 
 def clean_string(string):
@@ -24,6 +24,5 @@ vncserver \
 # Start noVNC server
 ./noVNC/utils/launch.sh --listen 3001 --vnc localhost:5902 1>/dev/null 2>/dev/null&
 
-# Run flask
-export FLASK_ENV=development
+# Run the app with the production server
 python3 -m coyote_badger.app
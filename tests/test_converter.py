@@ -0,0 +1,85 @@
+import pytest
+
+from coyote_badger.converter import CitationIndex, citation_key
+
+
+@pytest.mark.parametrize(
+    "citation, repeat",
+    [
+        ("Foo v. Bar, 1 U.S. 2 (2000)", "Foo v. Bar, 1 U.S. 2, 5 (2000)"),
+        ("Foo v. Bar, 1 F.3d 2 (2d Cir. 2000)", "Foo v. Bar, 1 F.3d 2, 7"),
+        (
+            "Foo v. Bar, 1 F.3d 2 (2d Cir. 2000)",
+            "Foo v. Bar, 1 F.3d 2, 7 (2d Cir. 2000) (holding that (a) applies)",
+        ),
+        (
+            "Smith, Title, 12 Harv. L. Rev. 34 (1999)",
+            "Smith, Title, 12 Harv. L. Rev. 34",
+        ),
+        ("Cal. Penal Code § 12 (West 2019)", "Cal. Penal Code § 12"),
+        (
+            "Restatement (Second) of Torts § 402A (1965)",
+            "Restatement (Second) of Torts § 402A",
+        ),
+        (
+            "Smith, Treatise (3d ed. 2010)",
+            "Smith, Treatise (3d ed. 2010) (discussing the rule)",
+        ),
+    ],
+)
+def test_citation_key_collapses(citation, repeat):
+    assert citation_key(citation) == citation_key(repeat)
+
+
+@pytest.mark.parametrize(
+    "citation, other",
+    [
+        (
+            "Restatement (Second) of Torts § 402A",
+            "Restatement (Third) of Torts § 402A",
+        ),
+        ("Restatement (Second)", "Restatement (Third)"),
+        ("Smith, Treatise (2d ed. 2005)", "Smith, Treatise (3d ed. 2010)"),
+        ("Foo v. Bar, 1 U.S. 2 (2000)", "Foo v. Bar, 1 U.S. 3 (2000)"),
+    ],
+)
+def test_citation_key_keeps_sources_apart(citation, other):
+    assert citation_key(citation) != citation_key(other)
+
+
+def test_find_repeated_citation():
+    index = CitationIndex()
+    index.add("Restatement (Second) of Torts § 402A (1965)")
+    assert index.find("See Restatement (Second) of Torts § 402A") is not None
+    assert index.find("Restatement (Third) of Torts § 402A") is None
+
+
+def test_find_supra():
+    index = CitationIndex()
+    index.add("John Smith & Jane Doe, A Title, 12 Harv. L. Rev. 34 (1999)")
+    found = index.find("Smith & Doe, supra note 3, at 40")
+    assert found == "John Smith & Jane Doe, A Title, 12 Harv. L. Rev. 34 (1999)"
+
+
+def test_find_id():
+    index = CitationIndex()
+    index.add("Foo v. Bar, 1 U.S. 2 (2000)")
+    assert index.find("Id.") == "Foo v. Bar, 1 U.S. 2 (2000)"
+
+
+def test_find_case_short_form_by_name():
+    index = CitationIndex()
+    index.add("Smith v. Jones, 5 F.3d 10 (2d Cir. 1993)")
+    index.add("Doe v. Roe, 5 F.3d 200 (3d Cir. 1993)")
+    assert index.find("Smith, 5 F.3d at 210") == index.find("Smith, 5 F.3d at 12")
+    assert index.find("Smith, 5 F.3d at 12").startswith("Smith v. Jones")
+    assert index.find("Doe, 5 F.3d at 205").startswith("Doe v. Roe")
+
+
+def test_find_case_short_form_without_name_uses_pin():
+    index = CitationIndex()
+    index.add("Smith v. Jones, 5 F.3d 10 (2d Cir. 1993)")
+    index.add("Doe v. Roe, 5 F.3d 200 (3d Cir. 1993)")
+    assert index.find("5 F.3d at 210").startswith("Doe v. Roe")
+    assert index.find("5 F.3d at 15").startswith("Smith v. Jones")
+    assert index.find("5 F.3d at 5") is None
@@ -0,0 +1,103 @@
+import os
+import shutil
+import sqlite3
+from collections import OrderedDict
+
+import pytest
+from openpyxl import load_workbook
+
+from coyote_badger import project as project_module
+from coyote_badger.catalog import Catalog
+from coyote_badger.project import HEADER_ROW, SOURCE_SHEET, Project
+
+EXAMPLE_FOLDER = os.path.join(
+    os.path.dirname(__file__), os.pardir, "_projects", "Example"
+)
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    monkeypatch.setattr(project_module, "PROJECTS_FOLDER", str(tmp_path))
+    monkeypatch.setattr(project_module, "catalog", Catalog(str(tmp_path / "c.db")))
+    shutil.copytree(EXAMPLE_FOLDER, tmp_path / "Example")
+    return Project("Example")
+
+
+def sheet_row(project, index):
+    ws = load_workbook(project.sources_file)[SOURCE_SHEET]
+    row = ws[HEADER_ROW + index]
+    return {
+        header: row[column - 1].value for header, column in project.header_index.items()
+    }
+
+
+def test_save_source_clears_fields(project):
+    source = project.get_source(1)
+    source.short_cite = "Brown"
+    source.filename = "Brown"
+    project.save_source(1, source)
+    project.sync_sources_file()
+
+    source.short_cite = ""
+    source.filename = ""
+    project.save_source(1, source)
+    project.sync_sources_file()
+
+    source = project.get_source(1)
+    assert (source.short_cite, source.filename) == ("", "")
+    row = sheet_row(project, 1)
+    assert (row["Short Cite"], row["Filename"]) == (None, None)
+
+
+def test_import_keeps_unsynced_sources(project):
+    source = project.get_source(2)
+    source.short_cite = "Pending"
+    project.save_source(2, source)
+    # The sheet is changed elsewhere before the save is synced
+    wb = load_workbook(project.sources_file)
+    wb[SOURCE_SHEET].cell(
+        HEADER_ROW + 3, project.header_index["Short Cite"]
+    ).value = None
+    wb.save(project.sources_file)
+
+    reopened = Project("Example")
+    assert reopened.get_source(2).short_cite == "Pending"
+    assert reopened.get_source(3).short_cite == ""
+    reopened.sync_sources_file()
+    assert sheet_row(reopened, 2)["Short Cite"] == "Pending"
+
+
+def test_patch_sources_sets_given_fields(project):
+    project.patch_sources({1: {"short_cite": "Brown", "filename": "Brown"}})
+    project.patch_sources({1: {"short_cite": "", "filename": ""}})
+    source = project.get_source(1)
+    assert (source.short_cite, source.filename) == ("", "")
+
+    long_cite = project.get_source(2).long_cite
+    project.patch_sources({2: {"short_cite": "Kept"}})
+    source = project.get_source(2)
+    assert (source.short_cite, source.long_cite) == ("Kept", long_cite)
+
+
+def test_evicted_project_closes_once_released(project, tmp_path, monkeypatch):
+    monkeypatch.setattr(project_module, "PROJECT_CACHE_SIZE", 1)
+    monkeypatch.setattr(project_module, "project_cache", OrderedDict())
+    shutil.copytree(EXAMPLE_FOLDER, tmp_path / "Other")
+    held = Project.get_project("Example")
+    db = held.db
+    Project.get_project("Other")
+    # Evicted, but still usable by whoever holds it (e.g. a pull)
+    assert held.get_source(1).long_cite
+    del held
+    with pytest.raises(sqlite3.ProgrammingError):
+        db.execute("SELECT 1")
+
+
+def test_changed_project_is_reopened(project, monkeypatch):
+    monkeypatch.setattr(project_module, "project_cache", OrderedDict())
+    first = Project.get_project("Example")
+    assert Project.get_project("Example") is first
+    os.utime(first.sources_file, ns=(0, 0))
+    second = Project.get_project("Example")
+    assert second is not first
+    assert Project.get_project("Example") is second
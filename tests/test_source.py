@@ -0,0 +1,97 @@
+import json
+import os
+import re
+
+import pytest
+from urlextract import URLExtract
+
+from coyote_badger.source import Kind, Source, classify
+
+CITATIONS_FILE = os.path.join(os.path.dirname(__file__), "data", "citations.json")
+
+
+@pytest.fixture(scope="module")
+def citations():
+    with open(CITATIONS_FILE, encoding="utf-8") as f:
+        return json.load(f)
+
+
+@pytest.fixture(scope="module")
+def extractor():
+    return URLExtract()
+
+
+def reference_kind(extractor, long_cite):
+    """The rules of infer_citation_kind, checked one at a time.
+
+    This is the original cascade, which the combined pattern must agree
+    with on every citation.
+    """
+    long_cite_lower = long_cite.lower()
+    long_cite_no_periods = long_cite.replace(".", "")
+
+    urls = extractor.find_urls(long_cite)
+    if urls:
+        return Kind.SSRN if "ssrn.com" in urls[0] else Kind.WEBSITE
+    if (
+        re.search("[0-9]+ [sS] ?[cC][tT] [0-9]+", long_cite_no_periods)
+        or re.search("[0-9]+ U ?S [0-9]+", long_cite_no_periods)
+        or re.search("[0-9]+ U ?S at [0-9]+", long_cite_no_periods)
+    ):
+        return Kind.SCOTUS
+    if " v. " in long_cite_lower or "in re " in long_cite_lower:
+        return Kind.NON_SCOTUS
+    if " u.s.c. " in long_cite_lower or " u.s. code " in long_cite_lower:
+        return Kind.FEDERAL
+    match = re.search("[0-9]+ (.{4,8}) [0-9]+", long_cite_no_periods)
+    if match and "usc" in match.group(1).lower():
+        return Kind.FEDERAL
+    if " stat. " in long_cite_lower or "§" in long_cite:
+        return Kind.STATE
+    if (
+        "," in long_cite
+        and re.search("\\([0-9]{4}\\)", long_cite)
+        and re.search("[0-9]+ .{7,}? [0-9]+", long_cite)
+    ):
+        return Kind.JOURNAL
+    return Kind.UNKNOWN
+
+
+def test_classify_matches_reference(citations, extractor):
+    expected = [reference_kind(extractor, citation) for citation in citations]
+    assert classify(citations) == expected
+
+
+def test_classify_matches_infer_kind(citations):
+    kinds = [Source(long_cite=citation).infer_kind() for citation in citations]
+    assert classify(citations) == kinds
+
+
+def test_corpus_covers_every_kind(citations, extractor):
+    kinds = {reference_kind(extractor, citation) for citation in citations}
+    assert kinds == set(Kind) - {Kind.BOOK}
+
+
+@pytest.mark.parametrize(
+    "long_cite, kind",
+    [
+        ("Smith v. Jones, 500 U.S. 100 (1990)", Kind.SCOTUS),
+        ("Smith v. Jones, 140 S. Ct. 10", Kind.SCOTUS),
+        ("Smith v. Jones, 5 F.3d 200 (2d Cir. 1993)", Kind.NON_SCOTUS),
+        ("In re Smith, 1 B.R. 2", Kind.NON_SCOTUS),
+        ("42 U.S.C. § 1983", Kind.FEDERAL),
+        ("42 U.S.C.A. 1983", Kind.FEDERAL),
+        ("Fla. Stat. § 790.10", Kind.STATE),
+        ("Posner, Title, 119 Harv. L. Rev. 32 (2005)", Kind.JOURNAL),
+        ("Doe, Title, https://www.example.com/a", Kind.WEBSITE),
+        ("Doe, Title, https://ssrn.com/abstract=1", Kind.SSRN),
+        ("Doe, A Book (2001)", Kind.UNKNOWN),
+    ],
+)
+def test_classify(long_cite, kind):
+    assert classify([long_cite]) == [kind]
+
+
+def test_classify_keeps_order_of_duplicates():
+    citations = ["42 U.S.C. § 1983", "Smith v. Jones", "42 U.S.C. § 1983"]
+    assert classify(citations) == [Kind.FEDERAL, Kind.NON_SCOTUS, Kind.FEDERAL]